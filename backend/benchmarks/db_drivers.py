@@ -0,0 +1,98 @@
+# Сравнение драйверов psycopg и asyncpg на типичных запросах при конкурентной нагрузке, запуск из backend/
+# (нужна БД с данными из src/initial_data.py):
+# python -m benchmarks.db_drivers --concurrency 50 --operations 5000
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import settings
+from src.db import build_engine
+from src.pool import PoolStats
+from src.synthetic_data import generate_users
+from src.users.service import UserCRUD
+
+DRIVERS = ("psycopg", "asyncpg")
+
+logging.getLogger("sqlalchemy").setLevel(logging.WARNING)
+
+
+async def lookup(session: AsyncSession) -> None:
+    """CRUDBase.get по уникальному полю - путь аутентификации при промахе кэша."""
+    await UserCRUD.get_by_username(session, settings.FIRST_SUPERUSER)
+
+
+async def user_list(session: AsyncSession) -> None:
+    """Первая страница GET /users/: keyset-пагинация с точным числом строк."""
+    await UserCRUD.get_page(session, limit=100)
+
+
+async def run(
+    session_factory: async_sessionmaker,
+    operation: Callable[[AsyncSession], Awaitable[None]],
+    concurrency: int,
+    operations: int,
+) -> tuple[float, list[float]]:
+    """
+    Выполняет operations операций в concurrency задачах, каждая операция - своя сессия и транзакция,
+    как запрос с SessionDep. Возвращает (операций в секунду, задержки в секундах).
+    """
+    latencies: list[float] = []
+    remaining = iter(range(operations))
+
+    async def worker() -> None:
+        for _ in remaining:
+            started_at = time.perf_counter()
+            async with session_factory() as session, session.begin():
+                await operation(session)
+            latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return operations / (time.perf_counter() - started_at), latencies
+
+
+async def bench_driver(driver: str, args: argparse.Namespace) -> list[tuple[str, str, float, float, float]]:
+    uri = settings.database_uri(settings.POSTGRES_SERVER, settings.POSTGRES_PORT, driver=driver)
+    engine = build_engine(uri, PoolStats(driver), driver=driver)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    rows = []
+    try:
+        for name, operation in (("CRUDBase.get", lookup), ("user list", user_list)):
+            await run(session_factory, operation, args.concurrency, args.warmup)  # соединения и кэши выражений
+            throughput, latencies = await run(session_factory, operation, args.concurrency, args.operations)
+            quantiles = statistics.quantiles(latencies, n=100)
+            rows.append((driver, name, throughput, quantiles[49] * 1000, quantiles[94] * 1000))
+    finally:
+        await engine.dispose()
+    return rows
+
+
+async def bench(args: argparse.Namespace) -> None:
+    if args.users:
+        await generate_users(args.users)
+    rows = []
+    for driver in args.drivers:
+        rows += await bench_driver(driver, args)
+    print(f"{'driver':<10}{'path':<16}{'ops/s':>10}{'p50, ms':>10}{'p95, ms':>10}")
+    for driver, name, throughput, p50, p95 in rows:
+        print(f"{driver:<10}{name:<16}{throughput:>10.0f}{p50:>10.2f}{p95:>10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare PostgreSQL drivers on CRUD paths under concurrency.")
+    parser.add_argument("--drivers", nargs="+", choices=DRIVERS, default=list(DRIVERS))
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--operations", type=int, default=5_000)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--users", type=int, default=0, help="generate synthetic users first (src/synthetic_data.py)")
+    args = parser.parse_args()
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
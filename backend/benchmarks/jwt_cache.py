@@ -0,0 +1,91 @@
+# Микробенчмарк кэша проверенных JWT на пути /users/me/, запуск из backend/:
+# python -m benchmarks.jwt_cache --iterations 20000
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from httpx import ASGITransport, AsyncClient
+
+from src.auth.cache import verified_token_cache
+from src.auth.service import create_access_token, decode_access_token
+from src.main import app
+from src.users.cache import principal_cache
+from src.users.models import User
+
+USERNAME = "jwt_cache_benchmark"
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def bench_decode(token: str, iterations: int, cached: bool) -> float:
+    """Среднее время decode_access_token в микросекундах."""
+    verified_token_cache.enabled = cached
+    verified_token_cache.clear()
+    decode_access_token(token)
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        decode_access_token(token)
+    return (time.perf_counter() - started_at) / iterations * 1e6
+
+
+async def bench_users_me(token: str, iterations: int, cached: bool) -> float:
+    """
+    Среднее время запроса GET /users/me/ через ASGITransport в микросекундах.
+
+    Принципал заранее положен в кэш, поэтому БД не нужна и разница определяется только
+    проверкой токена.
+    """
+    verified_token_cache.enabled = cached
+    verified_token_cache.clear()
+    headers = {"Authorization": f"Bearer {token}"}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        response = await client.get("/users/me/", headers=headers)
+        response.raise_for_status()
+        started_at = time.perf_counter()
+        for _ in range(iterations):
+            await client.get("/users/me/", headers=headers)
+    return (time.perf_counter() - started_at) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Verified JWT cache microbenchmark.")
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=2_000)
+    args = parser.parse_args()
+
+    principal_cache.put(
+        User(
+            id=uuid.uuid4(),
+            username=USERNAME,
+            email="jwt-cache-benchmark@example.com",
+            hashed_password="",
+            role_id=uuid.uuid4(),
+        )
+    )
+    token = create_access_token(data={"sub": USERNAME}, expires_delta=timedelta(hours=1))
+    enabled = verified_token_cache.enabled
+
+    rows = [
+        (
+            "decode_access_token",
+            bench_decode(token, args.iterations, False),
+            bench_decode(token, args.iterations, True),
+        ),
+        (
+            "GET /users/me/",
+            asyncio.run(bench_users_me(token, args.requests, False)),
+            asyncio.run(bench_users_me(token, args.requests, True)),
+        ),
+    ]
+    verified_token_cache.enabled = enabled
+
+    print(f"{'path':<22}{'uncached, us':>14}{'cached, us':>14}{'saved, us':>12}")
+    for name, uncached, cached in rows:
+        print(f"{name:<22}{uncached:>14.2f}{cached:>14.2f}{uncached - cached:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
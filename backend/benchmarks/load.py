@@ -0,0 +1,272 @@
+# Нагрузочный тест API: смесь сценариев на настоящих роутерах, запуск из backend/ (нужна БД с данными из
+# src/initial_data.py). В процессе через httpx.ASGITransport (по умолчанию) или по сети против запущенного uvicorn:
+# python -m benchmarks.load --duration 30 --concurrency 50 --output load.json
+# python -m benchmarks.load --url http://127.0.0.1:8000 --baseline load.json
+# Для --url поднимите LOGIN_THROTTLE_* в env сервера: все клиенты идут с одного IP и иначе упрутся в ограничитель
+# логинов - при ответах 429 прогон завершается с ошибкой, отчет не сохраняется. В процессе ограничитель отключается.
+# Созданные пользователи (префикс load_) удаляются в конце: в процессе - из БД, для --url - через API администратором.
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any
+
+import httpx
+from sqlmodel import delete
+
+from src.config import settings
+from src.db import async_session_factory
+from src.main import app
+from src.users.models import User
+
+logging.getLogger("sqlalchemy").setLevel(logging.WARNING)
+
+PREFIX = "load_"
+PASSWORD = "load_password"  # pragma: allowlist secret
+OTHER_PASSWORD = "load_password_2"  # pragma: allowlist secret
+SCENARIOS = ("login", "me", "list", "signup", "password")
+DEFAULT_MIX = "login=1,me=10,list=4,signup=1,password=0.5"
+
+
+class Recorder:
+    """Задержки и коды ответов по маршрутам."""
+
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter[int]] = defaultdict(Counter)
+
+    async def request(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started_at = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[route].append(time.perf_counter() - started_at)
+        self.statuses[route][response.status_code] += 1
+        return response
+
+    def report(self, duration: float) -> dict[str, Any]:
+        routes = {}
+        for route, latencies in sorted(self.latencies.items()):
+            quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+            routes[route] = {
+                "requests": len(latencies),
+                "errors": sum(count for status, count in self.statuses[route].items() if status >= 400),
+                "statuses": {str(status): count for status, count in sorted(self.statuses[route].items())},
+                "rps": len(latencies) / duration,
+                "p50_ms": quantiles[49] * 1000,
+                "p95_ms": quantiles[94] * 1000,
+                "p99_ms": quantiles[98] * 1000,
+            }
+        return routes
+
+
+class VirtualUser:
+    """Клиент со своим пользователем: регистрируется, логинится и выполняет сценарии из смеси."""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, run_id: str, number: int, admin_token: str):
+        self.client = client
+        self.recorder = recorder
+        self.username = f"{PREFIX}{run_id}_{number}"
+        self.password = PASSWORD
+        self.admin_token = admin_token
+        self.token: str | None = None
+        self.cursor: str | None = None
+        self.signups = 0
+        self.created: list[str] = []
+
+    async def signup(self, username: str) -> None:
+        body = {"username": username, "email": f"{username}@example.com", "password": PASSWORD}
+        response = await self.recorder.request(self.client, "POST /users/signup", "POST", "/users/signup", json=body)
+        if response.status_code == 200:
+            self.created.append(response.json()["id"])
+
+    async def signup_another(self) -> None:
+        self.signups += 1
+        await self.signup(f"{self.username}_{self.signups}")
+
+    async def login(self) -> None:
+        response = await self.recorder.request(
+            self.client,
+            "POST /auth/access-token",
+            "POST",
+            "/auth/access-token",
+            data={"username": self.username, "password": self.password},
+        )
+        if response.status_code == 200:
+            self.token = response.json()["access_token"]
+
+    async def me(self) -> None:
+        headers = {"Authorization": f"Bearer {self.token}"}
+        await self.recorder.request(self.client, "GET /users/me/", "GET", "/users/me/", headers=headers)
+
+    async def list_users(self) -> None:
+        """Страницы списка подряд по next_cursor, после последней - снова с первой."""
+        params = {"limit": 100} | ({"cursor": self.cursor} if self.cursor else {})
+        headers = {"Authorization": f"Bearer {self.admin_token}"}
+        response = await self.recorder.request(
+            self.client, "GET /users/", "GET", "/users/", params=params, headers=headers
+        )
+        self.cursor = response.json().get("next_cursor") if response.status_code == 200 else None
+
+    async def password(self) -> None:
+        """Смена пароля отзывает токены - после нее нужен новый логин."""
+        new_password = OTHER_PASSWORD if self.password == PASSWORD else PASSWORD
+        response = await self.recorder.request(
+            self.client,
+            "PATCH /users/me/password",
+            "PATCH",
+            "/users/me/password",
+            json={"current_password": self.password, "new_password": new_password},
+            headers={"Authorization": f"Bearer {self.token}"},
+        )
+        if response.status_code == 200:
+            self.password = new_password
+        await self.login()
+
+    async def run(self, mix: dict[str, float], deadline: float) -> None:
+        await self.signup(self.username)
+        await self.login()
+        actions = {
+            "login": self.login,
+            "me": self.me,
+            "list": self.list_users,
+            "signup": self.signup_another,
+            "password": self.password,
+        }
+        scenarios, weights = list(mix), list(mix.values())
+        while time.perf_counter() < deadline:
+            await actions[random.choices(scenarios, weights)[0]]()
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario {name}, expected one of {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def admin_token(client: httpx.AsyncClient) -> str:
+    data = {"username": settings.FIRST_SUPERUSER, "password": settings.FIRST_SUPERUSER_PASSWORD}
+    response = await client.post("/auth/access-token", data=data)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def delete_users(client: httpx.AsyncClient, token: str, users: list[VirtualUser]) -> None:
+    """Удаление созданных пользователей через API - для --url, где БД сервера недоступна напрямую."""
+    headers = {"Authorization": f"Bearer {token}"}
+    for user in users:
+        for user_id in user.created:
+            response = await client.delete(f"/users/{user_id}", headers=headers)
+            if response.status_code not in (200, 404):
+                print(f"Failed to delete user {user_id}: {response.status_code}", file=sys.stderr)
+
+
+async def drive(client: httpx.AsyncClient, args: argparse.Namespace) -> dict[str, Any]:
+    recorder = Recorder()
+    token = await admin_token(client)
+    run_id = uuid.uuid4().hex[:8]
+    started_at = time.perf_counter()
+    users = [VirtualUser(client, recorder, run_id, number, token) for number in range(args.concurrency)]
+    try:
+        await asyncio.gather(*(user.run(args.mix, started_at + args.duration) for user in users))
+        duration = time.perf_counter() - started_at
+    finally:
+        if args.url:
+            await delete_users(client, token, users)
+    routes = recorder.report(duration)
+    return {
+        "target": args.url or "in-process",
+        "concurrency": args.concurrency,
+        "duration_s": duration,
+        "mix": args.mix,
+        "rps": sum(route["requests"] for route in routes.values()) / duration,
+        "routes": routes,
+    }
+
+
+async def load(args: argparse.Namespace) -> dict[str, Any]:
+    base_url = f"{(args.url or 'http://test').rstrip('/')}/api/v{settings.APP_VERSION}"
+    if args.url:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            return await drive(client, args)
+    for name in ("USERNAME", "IP"):  # один клиент и один IP - ограничитель логинов только мешает замеру
+        setattr(settings, f"LOGIN_THROTTLE_{name}_RATE", 1e9)
+        setattr(settings, f"LOGIN_THROTTLE_{name}_BURST", 10**9)
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60) as client:
+                return await drive(client, args)
+    finally:
+        async with async_session_factory() as session, session.begin():
+            await session.execute(delete(User).where(User.username.startswith(PREFIX)))
+
+
+def compare(result: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> bool:
+    """Печатает изменения относительно baseline, возвращает False при регрессии больше tolerance."""
+    ok = True
+    print(f"\n{'route':<28}{'rps':>10}{'base':>10}{'p95, ms':>10}{'base':>10}")
+    for route, stats in result["routes"].items():
+        base = baseline["routes"].get(route)
+        if base is None:
+            continue
+        regressed = stats["p95_ms"] > base["p95_ms"] * (1 + tolerance) or stats["rps"] < base["rps"] * (1 - tolerance)
+        ok = ok and not regressed
+        mark = "  REGRESSION" if regressed else ""
+        print(
+            f"{route:<28}{stats['rps']:>10.1f}{base['rps']:>10.1f}{stats['p95_ms']:>10.2f}{base['p95_ms']:>10.2f}{mark}"
+        )
+    return ok
+
+
+def print_report(result: dict[str, Any]) -> None:
+    print(f"{result['target']}, {result['concurrency']} clients, {result['duration_s']:.1f} s, {result['rps']:.1f} rps")
+    print(f"{'route':<28}{'requests':>10}{'errors':>8}{'rps':>10}{'p50, ms':>10}{'p95, ms':>10}{'p99, ms':>10}")
+    for route, stats in result["routes"].items():
+        print(
+            f"{route:<28}{stats['requests']:>10}{stats['errors']:>8}{stats['rps']:>10.1f}"
+            f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+        )
+
+
+def throttled(result: dict[str, Any]) -> int:
+    return sum(route["statuses"].get("429", 0) for route in result["routes"].values())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the API with a mix of scenarios.")
+    parser.add_argument("--url", help="base URL of a running server, in-process ASGI by default")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"default {DEFAULT_MIX}")
+    parser.add_argument("--output", type=Path, help="save results as JSON")
+    parser.add_argument("--baseline", type=Path, help="compare with results saved by --output")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed p95/rps regression, 0.1 = 10%%")
+    args = parser.parse_args()
+    result = asyncio.run(load(args))
+    print_report(result)
+    if rejected := throttled(result):
+        print(
+            f"{rejected} requests were throttled (429): the report measures the limiter, not the API. "
+            "Raise LOGIN_THROTTLE_* in the server environment.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2))
+    if args.baseline and not compare(result, json.loads(args.baseline.read_text()), args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
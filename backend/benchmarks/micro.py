@@ -0,0 +1,205 @@
+# Микробенчмарки горячих функций запроса, без БД, запуск из backend/:
+# python -m benchmarks.micro --output micro.json
+# python -m benchmarks.micro --baseline micro.json  # после изменений, код выхода 1 при регрессии
+# Время на вызов - лучшее из --repeat замеров (как у timeit): меньше всего зависит от шума машины.
+# В результатах сохраняется коммит, на котором сделан замер, - отчет показывает, с чем сравниваем.
+import argparse
+import asyncio
+import inspect
+import json
+import subprocess
+import sys
+import time
+import timeit
+import uuid
+from collections.abc import Awaitable, Callable
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import Annotated, Any
+
+from fastapi import Depends, Request
+from fastapi.dependencies.utils import get_dependant, solve_dependencies
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import joinedload
+from sqlmodel import select
+
+from src.auth.keys import keyring
+from src.auth.service import create_access_token, decode_access_token, get_password_hash, verify_password
+from src.config import settings
+from src.users.cache import principal_cache
+from src.users.constants import UserRolesEnum
+from src.users.dependencies import get_current_active_user
+from src.users.models import Role, User
+from src.users.schemas import UserPublic
+from src.utils import render_email_template
+
+PASSWORD = "micro_password"  # pragma: allowlist secret
+MIN_SECONDS = 0.2  # один замер не короче, как timeit.Timer.autorange
+
+
+def sample_user() -> User:
+    role = Role(id=uuid.uuid4(), name=UserRolesEnum.user)
+    user = User(
+        id=uuid.uuid4(),
+        username="micro_user",
+        email="micro_user@example.com",
+        full_name="Micro User",
+        hashed_password=get_password_hash(PASSWORD),
+        role_id=role.id,
+    )
+    user.role = role
+    return user
+
+
+def user_query(username: str):
+    """Запрос get_user: то же построение, что в CRUDBase.get с joinedload роли."""
+    return select(User).where(User.username == username).options(joinedload(User.role, innerjoin=True))
+
+
+def me_request(token: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": f"/api/v{settings.APP_VERSION}/users/me/",
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+            "query_string": b"",
+            "client": ("127.0.0.1", 1),
+        }
+    )
+
+
+def dependency_case(token: str) -> Callable[[], Awaitable[Any]]:
+    """
+    Разрешение зависимостей /users/me/ (токен, сессия, принципал) без обработчика и HTTP.
+
+    Принципал заранее в кэше, поэтому сессия не берет соединение и замер не зависит от БД.
+    """
+
+    async def read_user_me(current_user: Annotated[UserPublic, Depends(get_current_active_user)]) -> Any:
+        return current_user
+
+    dependant = get_dependant(path="/users/me/", call=read_user_me)
+
+    async def resolve() -> Any:
+        async with AsyncExitStack() as stack:
+            solved = await solve_dependencies(
+                request=me_request(token), dependant=dependant, async_exit_stack=stack, embed_body_fields=False
+            )
+        assert not solved.errors, solved.errors
+        return solved.values
+
+    return resolve
+
+
+def cases() -> dict[str, Callable[[], Any]]:
+    user = sample_user()
+    principal_cache.put(user)
+    token = create_access_token({"sub": user.username})
+    public = UserPublic.model_validate(user.model_dump())
+    user_data = public.model_dump()
+    query = user_query(user.username)
+    email_context = {"project_name": settings.PROJECT_NAME, "email": user.email, "username": user.username}
+    result = {
+        "create_access_token": lambda: create_access_token({"sub": user.username}),
+        "jwt decode (keyring)": lambda: keyring.decode(token),
+        "decode_access_token (cached)": lambda: decode_access_token(token),
+        f"verify_password ({settings.BCRYPT_ROUNDS or 'default'} rounds)": lambda: verify_password(
+            PASSWORD, user.hashed_password
+        ),
+        "UserPublic.model_validate": lambda: UserPublic.model_validate(user_data),
+        "UserPublic.model_dump_json": public.model_dump_json,
+        "CRUDBase.get query build": lambda: user_query(user.username),
+        "CRUDBase.get query compile": lambda: query.compile(dialect=postgresql.dialect()),
+        "CRUDBase.get query cache key": query._generate_cache_key,
+        "resolve /users/me/ dependencies": dependency_case(token),
+    }
+    try:
+        render_email_template(template_name="new_account.html", context=email_context)
+    except FileNotFoundError:  # html-шаблоны собираются из mjml и в репозиторий не входят
+        print("render_email_template skipped: email templates are not built", file=sys.stderr)
+    else:
+        result["render_email_template"] = lambda: render_email_template(
+            template_name="new_account.html", context=email_context
+        )
+    return result
+
+
+def measure(func: Callable[[], Any], repeat: int) -> list[float]:
+    """Секунды на вызов в каждом из repeat замеров."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return [seconds / number for seconds in timer.repeat(repeat, number)]
+
+
+async def measure_async(func: Callable[[], Awaitable[Any]], repeat: int) -> list[float]:
+    async def run(number: int) -> float:
+        started_at = time.perf_counter()
+        for _ in range(number):
+            await func()
+        return time.perf_counter() - started_at
+
+    number = 1
+    while await run(number) < MIN_SECONDS:
+        number *= 2
+    return [await run(number) / number for _ in range(repeat)]
+
+
+def commit() -> str | None:
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"], capture_output=True).returncode != 0
+    return output.stdout.strip() + ("-dirty" if dirty else "")
+
+
+def bench(args: argparse.Namespace) -> dict[str, Any]:
+    results = {}
+    for name, func in cases().items():
+        if args.filter and args.filter not in name:
+            continue
+        if inspect.iscoroutinefunction(func):
+            timings = asyncio.run(measure_async(func, args.repeat))
+        else:
+            timings = measure(func, args.repeat)
+        results[name] = {"best_us": min(timings) * 1e6, "median_us": sorted(timings)[len(timings) // 2] * 1e6}
+        print(f"{name:<40}{results[name]['best_us']:>14.2f}", flush=True)
+    return {"commit": commit(), "python": sys.version.split()[0], "repeat": args.repeat, "benchmarks": results}
+
+
+def compare(result: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> bool:
+    """Печатает изменения относительно baseline, возвращает False при замедлении больше tolerance."""
+    ok = True
+    print(f"\n{baseline.get('commit') or 'baseline'} -> {result['commit'] or 'current'}")
+    print(f"{'benchmark':<40}{'us':>14}{'base, us':>14}{'change':>10}")
+    for name, stats in result["benchmarks"].items():
+        base = baseline["benchmarks"].get(name)
+        if base is None:
+            continue
+        change = stats["best_us"] / base["best_us"] - 1
+        regressed = change > tolerance
+        ok = ok and not regressed
+        mark = "  REGRESSION" if regressed else ""
+        print(f"{name:<40}{stats['best_us']:>14.2f}{base['best_us']:>14.2f}{change:>+10.1%}{mark}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmark per-request hot functions.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", help="run only benchmarks whose name contains this text")
+    parser.add_argument("--output", type=Path, help="save results as JSON")
+    parser.add_argument("--baseline", type=Path, help="compare with results saved by --output")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed slowdown, 0.1 = 10%%")
+    args = parser.parse_args()
+    print(f"{'benchmark':<40}{'us per call':>14}")
+    result = bench(args)
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2))
+    if args.baseline and not compare(result, json.loads(args.baseline.read_text()), args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
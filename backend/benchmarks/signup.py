@@ -0,0 +1,114 @@
+# Регистраций в секунду: прежний UserCRUD.create (SELECT по email, username и роли, затем INSERT) против
+# одного INSERT ... ON CONFLICT DO NOTHING RETURNING, запуск из backend/ (нужна БД с данными из src/initial_data.py):
+# python -m benchmarks.signup --concurrency 50 --signups 2000
+# По умолчанию bcrypt подменяется заглушкой, чтобы мерить только базу; --hash включает настоящее хэширование.
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import delete
+
+from src.db import async_session_factory, engine
+from src.users import service
+from src.users.constants import UserRolesEnum
+from src.users.exceptions import UserAlreadyExists
+from src.users.models import User
+from src.users.schemas import UserRegister
+from src.users.service import RoleCRUD, UserCRUD
+
+logging.getLogger("sqlalchemy").setLevel(logging.WARNING)
+
+PREFIX = "bench_signup_"
+
+
+async def fake_hash(password: str) -> str:
+    return "bench"
+
+
+async def legacy_create(session: AsyncSession, user_create: UserRegister) -> User:
+    """UserCRUD.create до перехода на ON CONFLICT: каждая проверка - отдельный запрос."""
+    if await UserCRUD.get_by_email(session, user_create.email):
+        raise UserAlreadyExists(f"User with email {user_create.email} already exists")
+    if await UserCRUD.get_by_username(session, user_create.username):
+        raise UserAlreadyExists(f"User with username {user_create.username} already exists")
+    role = await RoleCRUD.get(session, "name", UserRolesEnum.user.name)
+    hashed_password = await service.get_password_hash_async(user_create.password)
+    db_obj = User.model_validate(user_create, update={"hashed_password": hashed_password, "role_id": role.id})
+    session.add(db_obj)
+    await session.flush()
+    return db_obj
+
+
+async def run(
+    create: Callable[[AsyncSession, UserRegister], Awaitable[User]],
+    concurrency: int,
+    signups: int,
+    duplicates: float,
+) -> tuple[float, list[float]]:
+    """
+    signups регистраций в concurrency задачах, каждая - своя сессия и транзакция, как POST /users/signup.
+    Доля duplicates повторяет уже занятый username. Возвращает (регистраций в секунду, задержки в секундах).
+    """
+    latencies: list[float] = []
+    remaining = iter(range(signups))
+    taken: list[str] = []
+    every = round(1 / duplicates) if duplicates else 0
+
+    async def worker() -> None:
+        for number in remaining:
+            if every and taken and number % every == 0:
+                username = taken[-1]
+            else:
+                username = f"{PREFIX}{uuid.uuid4().hex[:12]}"
+            user = UserRegister(username=username, email=f"{username}@example.com", password="bench_password")
+            started_at = time.perf_counter()
+            try:
+                async with async_session_factory() as session, session.begin():
+                    await create(session, user)
+                taken.append(username)
+            except UserAlreadyExists:
+                pass
+            latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return signups / (time.perf_counter() - started_at), latencies
+
+
+async def bench(args: argparse.Namespace) -> None:
+    if not args.hash:
+        service.get_password_hash_async = fake_hash
+    rows = []
+    try:
+        for name, create in (("before", legacy_create), ("after", UserCRUD.create)):
+            await run(create, args.concurrency, args.warmup, args.duplicates)
+            throughput, latencies = await run(create, args.concurrency, args.signups, args.duplicates)
+            quantiles = statistics.quantiles(latencies, n=100)
+            rows.append((name, throughput, quantiles[49] * 1000, quantiles[94] * 1000))
+    finally:
+        async with async_session_factory() as session, session.begin():
+            await session.execute(delete(User).where(User.username.startswith(PREFIX)))
+        await engine.dispose()
+    print(f"{'create':<10}{'signups/s':>12}{'p50, ms':>10}{'p95, ms':>10}")
+    for name, throughput, p50, p95 in rows:
+        print(f"{name:<10}{throughput:>12.0f}{p50:>10.2f}{p95:>10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare signup throughput before and after ON CONFLICT creation.")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--signups", type=int, default=2_000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--duplicates", type=float, default=0.1, help="share of signups with a taken username")
+    parser.add_argument("--hash", action="store_true", help="hash passwords with bcrypt as in production")
+    args = parser.parse_args()
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
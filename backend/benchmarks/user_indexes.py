@@ -0,0 +1,100 @@
+# Планы запросов к user до и после индексов ревизии 4c1d8a7e2b90 на большом числе пользователей, запуск из backend/
+# (нужна БД с данными из src/initial_data.py и примененными миграциями):
+# python -m benchmarks.user_indexes --users 1000000
+# Недостающие пользователи с префиксом bench_idx_ создает src/synthetic_data.py, --cleanup удаляет их.
+# "До" - EXPLAIN ANALYZE в транзакции, которая удаляет индексы и откатывается: DROP INDEX держит
+# эксклюзивную блокировку user до отката, запускать только на своей базе.
+import argparse
+import asyncio
+import logging
+import re
+
+from sqlalchemy import text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from sqlmodel import delete, func, select
+
+from src.db import async_session_factory, engine
+from src.synthetic_data import generate_users, username
+from src.users.constants import UserRolesEnum
+from src.users.models import User
+from src.users.roles import role_registry
+
+logging.getLogger("sqlalchemy").setLevel(logging.WARNING)
+
+PREFIX = "bench_idx_"
+INDEXES = ("ix_user_active_username_id", "ix_user_email_lower", "ix_user_role_id")
+
+
+async def seed(session: AsyncSession, users: int) -> None:
+    await generate_users(users, prefix=PREFIX)
+    await session.execute(text('ANALYZE "user"'))
+    await session.commit()
+
+
+async def queries(session: AsyncSession, users: int) -> list[tuple[str, Select]]:
+    middle = (
+        await session.execute(select(User.username, User.id).where(User.username == username(users // 2, PREFIX)))
+    ).one()
+    admin_id = await role_registry.get_id(session, UserRolesEnum.admin)
+    return [
+        ("active page", select(User).where(User.is_active).order_by(User.username, User.id).limit(100)),
+        (
+            "active page, keyset",
+            select(User)
+            .where(User.is_active, tuple_(User.username, User.id) > tuple_(*middle))
+            .order_by(User.username, User.id)
+            .limit(100),
+        ),
+        (
+            "email lookup",
+            select(User).where(func.lower(User.email) == f"{username(users // 3, PREFIX)}@example.com").limit(1),
+        ),
+        ("users by role", select(func.count()).select_from(User).where(User.role_id == admin_id)),
+    ]
+
+
+async def explain(session: AsyncSession, query: Select) -> tuple[float, str]:
+    sql = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    plan = "\n".join((await session.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"))).scalars())
+    return float(re.search(r"Execution Time: ([\d.]+) ms", plan).group(1)), plan
+
+
+async def bench(args: argparse.Namespace) -> None:
+    try:
+        async with async_session_factory() as session:
+            if args.cleanup:
+                await session.execute(delete(User).where(User.username.startswith(PREFIX)))
+                await session.commit()
+                return
+            await seed(session, args.users)
+            named_queries = await queries(session, args.users)
+            results = {}
+            # без индексов: DDL в PostgreSQL транзакционный, откат возвращает индексы
+            for index in INDEXES:
+                await session.execute(text(f"DROP INDEX IF EXISTS {index}"))
+            for name, query in named_queries:
+                results[name] = [await explain(session, query)]
+            await session.rollback()
+            for name, query in named_queries:
+                results[name].append(await explain(session, query))
+    finally:
+        await engine.dispose()
+    for name, ((_, before_plan), (_, after_plan)) in results.items():
+        print(f"=== {name}\n--- before\n{before_plan}\n--- after\n{after_plan}\n")
+    print(f"{'query':<22}{'before, ms':>12}{'after, ms':>12}")
+    for name, ((before, _), (after, _)) in results.items():
+        print(f"{name:<22}{before:>12.2f}{after:>12.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Show user query plans without and with the lookup indexes.")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--cleanup", action="store_true", help="delete the generated users and exit")
+    args = parser.parse_args()
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
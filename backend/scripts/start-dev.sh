@@ -10,6 +10,8 @@ export APP_MODULE=${APP_MODULE:-"$MODULE_NAME:$VARIABLE_NAME"}
 
 HOST=${HOST:-0.0.0.0}
 PORT=${PORT:-8000}
+# адреса прокси, которым верят X-Forwarded-For/-Proto (IP клиента для ограничителя логинов)
+FORWARDED_ALLOW_IPS=${FORWARDED_ALLOW_IPS:-127.0.0.1}
 
 alembic upgrade head
-exec uvicorn --reload --proxy-headers --host $HOST --port $PORT "$APP_MODULE"
+exec uvicorn --reload --proxy-headers --forwarded-allow-ips "$FORWARDED_ALLOW_IPS" --host $HOST --port $PORT "$APP_MODULE"
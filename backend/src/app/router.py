@@ -1,4 +1,17 @@
-from fastapi import APIRouter
+from typing import Any
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from src.auth.cache import verified_token_cache
+from src.auth.hashing import password_hasher
+from src.auth.revocation import token_denylist
+from src.auth.throttling import login_throttle
+from src.db import all_pool_stats, replica_router
+from src.metrics import prometheus_text
+from src.users.authz import authz_versions
+from src.users.cache import principal_cache
+from src.users.dependencies import get_token_active_superuser
 
 router = APIRouter(
     prefix="/utils",
@@ -9,3 +22,35 @@ router = APIRouter(
 @router.get("/health-check")
 async def health_check() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@router.get("/cache-stats", dependencies=[Depends(get_token_active_superuser)])
+async def cache_stats() -> dict[str, Any]:
+    """Hit rate and size of in-process caches, only for superusers."""
+    return {
+        "principal": principal_cache.stats(),
+        "verified_jwt": verified_token_cache.stats(),
+        "token_denylist": token_denylist.stats(),
+        "authz_versions": authz_versions.stats(),
+    }
+
+
+@router.get("/hasher-stats", dependencies=[Depends(get_token_active_superuser)])
+async def hasher_stats() -> dict[str, Any]:
+    """Password hashing pool load: queue wait and hash time, only for superusers."""
+    return password_hasher.stats() | {"login_throttle": login_throttle.stats()}
+
+
+@router.get("/pool-stats", dependencies=[Depends(get_token_active_superuser)])
+async def db_pool_stats() -> dict[str, Any]:
+    """Database connection pool saturation of this worker, only for superusers."""
+    return {stats.name: stats.stats() for stats in all_pool_stats()} | {"replicas": replica_router.stats()}
+
+
+@router.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(get_token_active_superuser)])
+async def metrics() -> PlainTextResponse:
+    """Worker metrics in Prometheus text format, only for superusers."""
+    return PlainTextResponse(
+        prometheus_text(sample for stats in all_pool_stats() for sample in stats.samples()),
+        media_type="text/plain; version=0.0.4",
+    )
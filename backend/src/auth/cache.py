@@ -0,0 +1,51 @@
+import hashlib
+import time
+from typing import Any
+
+import jwt
+
+from src.auth.keys import DEFAULT_KID, KeyRing, keyring
+from src.cache import TTLCache
+from src.config import settings
+
+
+class VerifiedTokenCache:
+    """
+    Кэш уже проверенных access-токенов: sha256(токен) -> claims.
+
+    Клиент присылает один и тот же токен тысячи раз за срок его жизни, поэтому повторная проверка
+    подписи и claims заменяется поиском по digest. Запись живет до `exp` токена, но не дольше
+    `expire_at` ключа подписи. Ключ кэша включает отпечаток набора ключей (с самими секретами и
+    публичными ключами), так что после ротации или замены ключа кэш обходится.
+    """
+
+    def __init__(self, maxsize: int, enabled: bool = True, keyring: KeyRing = keyring):
+        self._cache: TTLCache[tuple[str, bytes], dict[str, Any]] = TTLCache(maxsize, ttl=0, name="verified_jwt")
+        self.enabled = enabled and maxsize > 0
+        self.keyring = keyring
+
+    def _key(self, token: str) -> tuple[str, bytes]:
+        return self.keyring.fingerprint, hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict[str, Any] | None:
+        if not self.enabled:
+            return None
+        return self._cache.get(self._key(token))
+
+    def put(self, token: str, claims: dict[str, Any]) -> None:
+        if not self.enabled or "exp" not in claims:
+            return
+        expires_at = float(claims["exp"])
+        key = self.keyring.get(jwt.get_unverified_header(token).get("kid", DEFAULT_KID))
+        if key is not None and key.expire_at is not None:
+            expires_at = min(expires_at, key.expire_at.timestamp())
+        self._cache.set(self._key(token), claims, ttl=expires_at - time.time())
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return self._cache.stats()
+
+
+verified_token_cache = VerifiedTokenCache(maxsize=settings.JWT_CACHE_MAX_SIZE)
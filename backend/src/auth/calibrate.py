@@ -0,0 +1,79 @@
+# Подбор стоимости bcrypt под текущее железо, запуск из скрипта:
+# python -m src.auth.calibrate --target-ms 50 --env-file ../.env
+import argparse
+import logging
+import re
+import statistics
+import time
+from pathlib import Path
+
+from passlib.hash import bcrypt
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MIN_ROUNDS = 4
+MAX_ROUNDS = 16
+SAMPLE_PASSWORD = "calibration-password"  # pragma: allowlist secret
+
+
+def measure(rounds: int, samples: int) -> float:
+    """Медиана времени хэширования в миллисекундах."""
+    handler = bcrypt.using(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        started_at = time.perf_counter()
+        handler.hash(SAMPLE_PASSWORD)
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float, samples: int) -> tuple[int, dict[int, float]]:
+    """
+    Возвращает число раундов, время хэширования которого ближе всего к target_ms.
+
+    Каждый раунд удваивает стоимость, поэтому перебор останавливается, как только
+    время превысило цель вдвое.
+    """
+    timings: dict[int, float] = {}
+    measure(MIN_ROUNDS, 1)  # прогрев: загрузка backend bcrypt в passlib
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        timings[rounds] = measure(rounds, samples)
+        logger.info(f"rounds={rounds}: {timings[rounds]:.1f} ms")
+        if timings[rounds] > target_ms * 2:
+            break
+    best = min(timings, key=lambda r: abs(timings[r] - target_ms))
+    return best, timings
+
+
+def write_setting(env_file: Path, name: str, value: str) -> None:
+    """Обновляет или добавляет строку NAME=value в env-файле."""
+    lines = env_file.read_text().splitlines() if env_file.exists() else []
+    pattern = re.compile(rf"^\s*{name}\s*=")
+    line = f"{name}={value}"
+    for i, existing in enumerate(lines):
+        if pattern.match(existing):
+            lines[i] = line
+            break
+    else:
+        lines.append(line)
+    env_file.write_text("\n".join(lines) + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calibrate bcrypt rounds for the current machine.")
+    parser.add_argument("--target-ms", type=float, default=50.0, help="desired hash latency, ms")
+    parser.add_argument("--samples", type=int, default=5, help="hashes per rounds value")
+    parser.add_argument("--env-file", type=Path, default=Path("../.env"), help="env file to write BCRYPT_ROUNDS to")
+    parser.add_argument("--dry-run", action="store_true", help="only print the result")
+    args = parser.parse_args()
+
+    rounds, timings = calibrate(args.target_ms, args.samples)
+    logger.info(f"Selected BCRYPT_ROUNDS={rounds} ({timings[rounds]:.1f} ms, target {args.target_ms} ms)")
+    if not args.dry_run:
+        write_setting(args.env_file, "BCRYPT_ROUNDS", str(rounds))
+        logger.info(f"BCRYPT_ROUNDS written to {args.env_file}")
+
+
+if __name__ == "__main__":
+    main()
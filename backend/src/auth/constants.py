@@ -1,7 +1,28 @@
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from src.config import settings
+
+
+def build_pwd_context(rounds: int | None = None) -> CryptContext:
+    """
+    Контекст хэширования паролей.
+
+    Если задано число раундов bcrypt, хэши с другим количеством раундов считаются устаревшими
+    (needs_update) и перехэшируются при следующем успешном логине.
+    """
+    if rounds is None:
+        return CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+pwd_context = build_pwd_context(settings.BCRYPT_ROUNDS)
 
 
 class JWTBearer(OAuth2PasswordBearer):
@@ -17,3 +38,6 @@ USER_NOT_FOUND = "The user with this email does not exist in the system."
 PASSWORD_RECOVERY_EMAIL_SENT = "Password recovery email sent"  # pragma: allowlist secret
 INVALID_TOKEN = "Invalid token"
 PASSWORD_UPDATED_SUCCESSFULLY = "Password updated successfully"  # pragma: allowlist secret
+LOGGED_OUT = "Logged out successfully"
+SERVICE_OVERLOADED = "Too many concurrent password operations, try again later"  # pragma: allowlist secret
+TOO_MANY_LOGIN_ATTEMPTS = "Too many login attempts, try again later"
@@ -1,22 +1,39 @@
+import logging
 from typing import Annotated
 
 from fastapi import Depends
+from sqlalchemy.exc import SQLAlchemyError
 
 from src.auth.constants import JWTBearer
-from src.auth.service import verify_password
+from src.auth.service import verify_and_update_password_async
 from src.db import SessionDep
 from src.users.models import User
-from src.users.service import get_user
+from src.users.service import UserCRUD, get_user
+
+logger = logging.getLogger(__name__)
 
 
 async def authenticate_user(session: SessionDep, username: str, password: str) -> User:
     user = await get_user(session, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    verified, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if not verified:
         return False
+    if new_hash:
+        await rehash_password(session, user, new_hash)
     return user
 
 
+async def rehash_password(session: SessionDep, user: User, new_hash: str) -> None:
+    """Тихо сохраняет хэш с актуальной стоимостью, ошибка записи не мешает логину."""
+    try:
+        # SAVEPOINT: ошибка откатывает только перехэширование, а не транзакцию запроса
+        async with session.begin_nested():
+            await UserCRUD.crud.update(session, "id", user.id, hashed_password=new_hash)
+    except SQLAlchemyError as e:
+        logger.warning(f"Password rehash for user {user.username} failed: {e}")
+
+
 oauth2_scheme = JWTBearer(tokenUrl="/auth/access-token")
 TokenDep = Annotated[str, Depends(oauth2_scheme)]
@@ -1,9 +1,21 @@
+import math
+
 from fastapi import status
 
 from src.auth import constants
 from src.exceptions import HTTPResponseException
 
 
+class PasswordHasherBusy(Exception):
+    pass
+
+
+class LoginThrottled(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Login throttled, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
 class InactiveUserException(HTTPResponseException):
     def __init__(self, status_code=None):
         super().__init__(detail=constants.INACTIVE_USER)
@@ -32,3 +44,21 @@ class UserNotFoundException(HTTPResponseException):
 class InvalidTokenException(HTTPResponseException):
     def __init__(self):
         super().__init__(status.HTTP_400_BAD_REQUEST, detail=constants.INVALID_TOKEN)
+
+
+class PasswordHasherBusyException(HTTPResponseException):
+    def __init__(self):
+        super().__init__(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=constants.SERVICE_OVERLOADED,
+            headers={"Retry-After": "1"},
+        )
+
+
+class LoginThrottledException(HTTPResponseException):
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=constants.TOO_MANY_LOGIN_ATTEMPTS,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Literal
+
+from src.auth.exceptions import PasswordHasherBusy
+from src.config import settings
+from src.metrics import TimingStats
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasher:
+    """
+    Выполняет bcrypt вне event loop в пуле потоков или процессов.
+
+    Одновременно выполняется не больше `max_workers` операций, еще `max_queue` ждут своей
+    очереди. Если очередь заполнена, сразу поднимается PasswordHasherBusy (503), чтобы всплеск
+    логинов не копил запросы и не блокировал остальные эндпоинты воркера.
+    """
+
+    def __init__(self, executor_type: Literal["thread", "process"], max_workers: int, max_queue: int):
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Executor | None = None
+        self._semaphore = asyncio.Semaphore(max_workers)
+        self._waiting = 0
+        self._running = 0
+        self.rejected = 0
+        self.queue_wait = TimingStats()
+        self.hash_time = TimingStats()
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hasher")
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise PasswordHasherBusy(f"Password hasher queue is full ({self._waiting} waiting)")
+        self._waiting += 1
+        enqueued_at = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self._running += 1
+        try:
+            started_at = time.perf_counter()
+            self.queue_wait.observe(started_at - enqueued_at)
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+            self.hash_time.observe(time.perf_counter() - started_at)
+            return result
+        finally:
+            self._running -= 1
+            self._semaphore.release()
+
+    async def map(self, func: Callable[[Any], Any], items: list[Any]) -> list[Any]:
+        """
+        Пакетная обработка (импорт пользователей): все элементы сразу отдаются пулу, параллельность
+        ограничена числом его воркеров, лимит очереди не применяется.
+        """
+        loop = asyncio.get_running_loop()
+        self._running += len(items)
+        try:
+            return await asyncio.gather(*(loop.run_in_executor(self.executor, func, item) for item in items))
+        finally:
+            self._running -= len(items)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "executor": self.executor_type,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": self._running,
+            "waiting": self._waiting,
+            "rejected": self.rejected,
+            "queue_wait": self.queue_wait.stats(),
+            "hash_time": self.hash_time.stats(),
+        }
+
+
+password_hasher = PasswordHasher(
+    executor_type=settings.PASSWORD_HASHER_EXECUTOR,
+    max_workers=settings.PASSWORD_HASHER_MAX_WORKERS,
+    max_queue=settings.PASSWORD_HASHER_MAX_QUEUE,
+)
+
+# отдельный пул для импорта, чтобы пакетное хэширование не вытесняло логины
+import_password_hasher = PasswordHasher(
+    executor_type=settings.PASSWORD_HASHER_EXECUTOR,
+    max_workers=settings.USER_IMPORT_HASHER_MAX_WORKERS,
+    max_queue=0,
+)
@@ -1,6 +1,43 @@
-from sqlmodel import SQLModel
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, func
+from sqlmodel import Field, SQLModel
 
 
 class Token(SQLModel):
     access_token: str
     token_type: str
+
+
+class RevokedToken(SQLModel, table=True):
+    """
+    Отозванные access-токены.
+
+    Строка с jti отзывает один токен до его exp. Строка без jti, но с user_id отзывает все токены
+    пользователя, выданные раньше revoked_at (смена пароля, удаление пользователя).
+    """
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    jti: str | None = Field(default=None, unique=True, max_length=64)
+    user_id: uuid.UUID | None = Field(default=None, index=True)
+    revoked_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False, index=True, server_default=func.now())
+    )
+    expires_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+
+
+class LoginTokenBucket(SQLModel, table=True):
+    """Token bucket ограничителя логинов (LOGIN_THROTTLE_BACKEND=postgres)."""
+
+    key: str = Field(primary_key=True, max_length=320)
+    tokens: float
+    updated_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+
+
+class LoginFailure(SQLModel, table=True):
+    """Неудачные попытки логина за скользящее окно (LOGIN_THROTTLE_BACKEND=postgres)."""
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    key: str = Field(index=True, max_length=320)
+    failed_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False, index=True))
@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import logging
+import math
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import delete, select
+
+from src.auth.models import RevokedToken
+from src.config import settings
+from src.db import on_commit
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Битовый фильтр Блума: "точно нет" или "возможно есть" за k проб без обращения к множеству."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(capacity, 1)
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8]), int.from_bytes(digest[8:])
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TokenDenylist:
+    """
+    In-memory список отозванных токенов, зеркало таблицы revokedtoken.
+
+    Загружается целиком при старте и затем подтягивает только новые строки, поэтому проверка
+    на каждом запросе - это проба фильтра Блума (и множества jti при попадании) плюс поиск
+    отсечки пользователя в dict, без обращений к БД.
+    """
+
+    def __init__(self, refresh_seconds: float, reload_seconds: float, capacity: int = 10_000):
+        self.refresh_seconds = refresh_seconds
+        self.reload_seconds = reload_seconds
+        self._capacity = capacity
+        self._jtis: dict[str, datetime] = {}
+        self._bloom = BloomFilter(capacity)
+        self._user_cutoffs: dict[UUID, int] = {}
+        self._last_seen: datetime | None = None
+        self.loaded_at: datetime | None = None
+
+    def is_revoked(self, claims: dict[str, Any], user_id: UUID) -> bool:
+        jti = claims.get("jti")
+        if jti is not None and jti in self._bloom and jti in self._jtis:
+            return True
+        cutoff = self._user_cutoffs.get(user_id)
+        # iat в секундах: токен, выданный в ту же секунду, что и отзыв, остается действительным
+        return cutoff is not None and claims.get("iat", 0) < cutoff
+
+    def _remember(self, row: RevokedToken) -> None:
+        if row.jti is not None:
+            if row.jti not in self._jtis:
+                if self._bloom.count >= self._bloom.capacity:
+                    self._rebuild_bloom(capacity=self._bloom.capacity * 2)
+                self._bloom.add(row.jti)
+            self._jtis[row.jti] = row.expires_at
+        elif row.user_id is not None:
+            cutoff = int(row.revoked_at.timestamp())
+            self._user_cutoffs[row.user_id] = max(cutoff, self._user_cutoffs.get(row.user_id, 0))
+        if self._last_seen is None or row.revoked_at > self._last_seen:
+            self._last_seen = row.revoked_at
+
+    def _rebuild_bloom(self, capacity: int) -> None:
+        self._bloom = BloomFilter(max(capacity, self._capacity))
+        for jti in self._jtis:
+            self._bloom.add(jti)
+
+    async def load(self, session: AsyncSession) -> None:
+        """Полная перезагрузка: удаляет истекшие записи и заново строит фильтр."""
+        now = datetime.now(UTC)
+        await session.execute(delete(RevokedToken).where(RevokedToken.expires_at < now))
+        await session.commit()
+        rows = (await session.execute(select(RevokedToken))).scalars().all()
+        self._jtis, self._user_cutoffs, self._last_seen = {}, {}, None
+        self._bloom = BloomFilter(max(len(rows) * 2, self._capacity))
+        for row in rows:
+            self._remember(row)
+        self.loaded_at = now
+        logger.info(f"Token denylist loaded: {len(self._jtis)} tokens, {len(self._user_cutoffs)} users")
+
+    async def refresh(self, session: AsyncSession) -> None:
+        """Подтягивает строки, добавленные другими воркерами и репликами."""
+        query = select(RevokedToken)
+        if self._last_seen is not None:
+            # запас на расхождение часов узлов и долгие транзакции, повторное добавление безвредно
+            since = self._last_seen - timedelta(seconds=settings.TOKEN_REVOCATION_REFRESH_OVERLAP_SECONDS)
+            query = query.where(RevokedToken.revoked_at > since)
+        for row in (await session.execute(query)).scalars().all():
+            self._remember(row)
+
+    async def _revoke(self, session: AsyncSession, *rows: RevokedToken) -> None:
+        values = [row.model_dump() for row in rows]
+        await session.execute(insert(RevokedToken).values(values).on_conflict_do_nothing())
+        # фиксирует отзыв транзакция запроса, откат не должен оставлять токен отозванным локально
+        on_commit(session, lambda: [self._remember(row) for row in rows])
+
+    async def revoke_token(self, session: AsyncSession, claims: dict[str, Any], user_id: UUID) -> None:
+        """Отзывает один токен (logout). Токены без jti отозвать поштучно нельзя."""
+        if claims.get("jti") is None:
+            return
+        await self._revoke(
+            session,
+            RevokedToken(
+                jti=claims["jti"],
+                user_id=user_id,
+                revoked_at=datetime.now(UTC),
+                expires_at=datetime.fromtimestamp(claims["exp"], UTC),
+            ),
+        )
+
+    async def revoke_user(self, session: AsyncSession, user_id: UUID) -> None:
+        """Отзывает все токены пользователя, выданные до текущего момента."""
+        await self.revoke_users(session, [user_id])
+
+    async def revoke_users(self, session: AsyncSession, user_ids: list[UUID]) -> None:
+        """Отзывает токены нескольких пользователей одним запросом."""
+        if not user_ids:
+            return
+        now = datetime.now(UTC)
+        expires_at = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        await self._revoke(
+            session, *(RevokedToken(user_id=user_id, revoked_at=now, expires_at=expires_at) for user_id in user_ids)
+        )
+
+    async def run(self, session_factory: Callable[[], AsyncSession]) -> None:
+        """Фоновая задача: инкрементальное обновление и периодическая полная перезагрузка."""
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                async with session_factory() as session:
+                    reload_due = self.loaded_at is None or (
+                        datetime.now(UTC) - self.loaded_at > timedelta(seconds=self.reload_seconds)
+                    )
+                    if reload_due:
+                        await self.load(session)
+                    else:
+                        await self.refresh(session)
+            except Exception as e:
+                logger.error(f"Token denylist refresh failed: {e}")
+
+    def clear(self) -> None:
+        self._jtis, self._user_cutoffs, self._last_seen = {}, {}, None
+        self._bloom = BloomFilter(self._capacity)
+        self.loaded_at = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "tokens": len(self._jtis),
+            "users": len(self._user_cutoffs),
+            "bloom_capacity": self._bloom.capacity,
+            "last_seen": self._last_seen.isoformat() if self._last_seen else None,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+        }
+
+
+token_denylist = TokenDenylist(
+    refresh_seconds=settings.TOKEN_REVOCATION_REFRESH_SECONDS,
+    reload_seconds=settings.TOKEN_REVOCATION_RELOAD_SECONDS,
+)
@@ -1,24 +1,29 @@
 from datetime import timedelta
 from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
 
 from src.auth import constants, exceptions
 from src.auth.dependencies import TokenDep, authenticate_user
+from src.auth.keys import keyring
+from src.auth.revocation import token_denylist
 from src.auth.schemas import NewPassword, Token
 from src.auth.service import (
     create_access_token,
     generate_password_reset_token,
     generate_reset_password_email,
-    get_password_hash,
+    get_password_hash_async,
     verify_password_reset_token,
 )
+from src.auth.throttling import login_throttle
 from src.config import settings
 from src.db import SessionDep
 from src.schemas import Message
-from src.users.dependencies import CurrentUser, get_current_active_superuser
+from src.users.authz import build_authz_claim
+from src.users.cache import principal_cache
+from src.users.dependencies import CurrentPrincipal, TokenPayloadDep, get_token_active_superuser
 from src.users.schemas import UserPublic
 from src.users.service import UserCRUD
 from src.utils import send_email
@@ -28,24 +33,54 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/access-token", response_model=Token)
 async def login_for_access_token(
+    request: Request,
     session: SessionDep,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> Any:
+    client_ip = request.client.host if request.client else None
+    try:
+        await login_throttle.check(form_data.username, client_ip)
+    except exceptions.LoginThrottled as e:
+        raise HTTPException(**exceptions.LoginThrottledException(e.retry_after).dict())
     user = await authenticate_user(session, form_data.username, form_data.password)
     if not user:
+        await login_throttle.register_failure(form_data.username, client_ip)
         raise HTTPException(**exceptions.IncorrectUsernameOrPasswordException().dict())
+    await login_throttle.register_success(form_data.username)
     if not user.is_active:
         raise HTTPException(**exceptions.InactiveUserException(status_code=status.HTTP_403_FORBIDDEN).dict())
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(data={"sub": user.username}, expires_delta=access_token_expires)
+    access_token = create_access_token(
+        data={"sub": user.username, "authz": build_authz_claim(user)},
+        expires_delta=access_token_expires,
+    )
     return Token(access_token=access_token, token_type="bearer")
 
 
 @router.post("/test-token", response_model=UserPublic)
-async def test_token(current_user: CurrentUser, token: TokenDep) -> Any:
+async def test_token(current_user: CurrentPrincipal, token: TokenDep) -> Any:
     return current_user
 
 
+@router.post("/logout", response_model=Message)
+async def logout(session: SessionDep, current_user: CurrentPrincipal, payload: TokenPayloadDep) -> Message:
+    """
+    Revoke the access token used for this request.
+    """
+    await token_denylist.revoke_token(session, payload, current_user.id)
+    return Message(message=constants.LOGGED_OUT)
+
+
+@router.get("/.well-known/jwks.json")
+async def jwks() -> JSONResponse:
+    """
+    Public keys for local verification of access tokens by other services.
+    """
+    return JSONResponse(
+        content=keyring.jwks(), headers={"Cache-Control": f"public, max-age={settings.JWT_KEYS_RELOAD_SECONDS}"}
+    )
+
+
 @router.post("/password-recovery/{email}", response_model=Message)
 async def recover_password(email: str, session: SessionDep):
     """
@@ -78,16 +113,17 @@ async def reset_password(session: SessionDep, body: NewPassword) -> Message:
         raise HTTPException(**exceptions.UserNotFoundException().dict())
     elif not user.is_active:
         raise HTTPException(**exceptions.InactiveUserException(status_code=status.HTTP_400_BAD_REQUEST).dict())
-    hashed_password = get_password_hash(password=body.new_password)
+    hashed_password = await get_password_hash_async(password=body.new_password)
     user.hashed_password = hashed_password
     session.add(user)
-    await session.commit()
+    principal_cache.invalidate_on_commit(session, username=user.username)
+    await token_denylist.revoke_user(session, user.id)
     return Message(message=constants.PASSWORD_UPDATED_SUCCESSFULLY)
 
 
 @router.post(
     "/password-recovery-html-content/{email}",
-    dependencies=[Depends(get_current_active_superuser)],
+    dependencies=[Depends(get_token_active_superuser)],
     response_class=HTMLResponse,
 )
 async def recover_password_html_content(email: str, session: SessionDep) -> Any:
@@ -1,8 +1,12 @@
+import uuid
 from datetime import UTC, datetime, timedelta
 
 import jwt
 
+from src.auth.cache import verified_token_cache
 from src.auth.constants import pwd_context
+from src.auth.hashing import password_hasher
+from src.auth.keys import keyring
 from src.config import settings
 from src.utils import EmailData, render_email_template
 
@@ -15,6 +19,23 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Проверяет пароль и возвращает новый хэш, если текущий устарел (например, другое число раундов)."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return await password_hasher.run(verify_and_update_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.run(get_password_hash, password)
+
+
 def generate_reset_password_email(email_to: str, email: str, token: str) -> EmailData:
     project_name = settings.PROJECT_NAME
     subject = f"{project_name} - Password recovery for user {email}"
@@ -53,17 +74,13 @@ def generate_password_reset_token(email: str) -> str:
     now = datetime.now(UTC)
     expires = now + delta
     exp = expires.timestamp()
-    encoded_jwt = jwt.encode(
-        {"exp": exp, "nbf": now, "sub": email},
-        settings.SECRET_KEY,
-        algorithm=settings.ALGORITHM,
-    )
+    encoded_jwt = keyring.encode({"exp": exp, "nbf": now, "sub": email})
     return encoded_jwt
 
 
 def verify_password_reset_token(token: str) -> str | None:
     try:
-        decoded_token = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        decoded_token = keyring.decode(token)
         return str(decoded_token["sub"])
     except jwt.InvalidTokenError:
         return None
@@ -71,10 +88,26 @@ def verify_password_reset_token(token: str) -> str | None:
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
+    now = datetime.now(UTC)
     if expires_delta:
-        expire = datetime.now(UTC) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(UTC) + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        expire = now + timedelta(minutes=15)
+    to_encode.update({"exp": expire, "iat": now, "jti": uuid.uuid4().hex})
+    encoded_jwt = keyring.encode(to_encode)
     return encoded_jwt
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Claims access-токена с проверкой подписи и срока действия.
+
+    Повторные обращения с тем же токеном обслуживаются из кэша проверенных токенов.
+    Поднимает jwt.InvalidTokenError для невалидного токена.
+    """
+    keyring.maybe_reload()
+    claims = verified_token_cache.get(token)
+    if claims is None:
+        claims = keyring.decode(token)
+        verified_token_cache.put(token, claims)
+    return claims
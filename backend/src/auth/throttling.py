@@ -0,0 +1,274 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import delete, select
+
+from src.auth.exceptions import LoginThrottled
+from src.auth.models import LoginFailure, LoginTokenBucket
+from src.cache import TTLCache
+from src.config import settings
+from src.db import async_session_factory
+
+
+class ThrottleBackend(ABC):
+    """
+    Хранилище состояния ограничителя логинов.
+
+    consume - token bucket: списывает токен и возвращает, через сколько секунд повторить (0 - разрешено).
+    add_failure/failures - журнал неудачных попыток за скользящее окно: (количество, время самой старой).
+    """
+
+    @abstractmethod
+    async def consume(self, key: str, rate: float, burst: int) -> float: ...
+
+    @abstractmethod
+    async def add_failure(self, key: str, window: float) -> None: ...
+
+    @abstractmethod
+    async def failures(self, key: str, window: float) -> tuple[int, float | None]: ...
+
+    @abstractmethod
+    async def reset_failures(self, key: str) -> None: ...
+
+    def clear(self) -> None:
+        """Сбрасывает состояние в памяти процесса; у внешних хранилищ (Postgres, Redis) его нет."""
+        return None
+
+
+class MemoryThrottleBackend(ThrottleBackend):
+    """Состояние в памяти процесса: у каждого воркера свои счетчики."""
+
+    def __init__(self, maxsize: int = 100_000):
+        self._buckets: TTLCache[str, tuple[float, float]] = TTLCache(maxsize, ttl=0, name="login_buckets")
+        self._failures: TTLCache[str, deque[float]] = TTLCache(maxsize, ttl=0, name="login_failures")
+
+    async def consume(self, key: str, rate: float, burst: int) -> float:
+        now = time.time()
+        tokens, updated_at = self._buckets.get(key) or (float(burst), now)
+        tokens = min(float(burst), tokens + (now - updated_at) * rate)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+        # полностью восстановившийся bucket не отличается от отсутствующего
+        self._buckets.set(key, (tokens, now), ttl=(burst - tokens) / rate + 1)
+        return retry_after
+
+    async def add_failure(self, key: str, window: float) -> None:
+        attempts = self._failures.get(key) or deque()
+        attempts.append(time.time())
+        self._failures.set(key, attempts, ttl=window)
+
+    async def failures(self, key: str, window: float) -> tuple[int, float | None]:
+        attempts = self._failures.get(key)
+        if not attempts:
+            return 0, None
+        since = time.time() - window
+        while attempts and attempts[0] <= since:
+            attempts.popleft()
+        return len(attempts), attempts[0] if attempts else None
+
+    async def reset_failures(self, key: str) -> None:
+        self._failures.pop(key)
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._failures.clear()
+
+
+class PostgresThrottleBackend(ThrottleBackend):
+    """Общее для всех воркеров и реплик состояние в таблицах logintokenbucket и loginfailure."""
+
+    def __init__(self, session_factory: Callable[[], AsyncSession]):
+        self.session_factory = session_factory
+
+    async def consume(self, key: str, rate: float, burst: int) -> float:
+        table = LoginTokenBucket.__table__
+        refilled = func.least(
+            burst,
+            table.c.tokens + func.extract("epoch", func.now() - table.c.updated_at) * rate,
+        )
+        # отказ bucket не трогает: токен списывается, только если он есть (как в памяти и в Redis)
+        query = (
+            insert(LoginTokenBucket)
+            .values(key=key, tokens=burst - 1, updated_at=func.now())
+            .on_conflict_do_update(
+                index_elements=[table.c.key],
+                set_={"tokens": refilled - 1, "updated_at": func.now()},
+                where=refilled >= 1,
+            )
+            .returning(table.c.tokens)
+        )
+        async with self.session_factory() as session:
+            if (await session.execute(query)).first() is not None:
+                await session.commit()
+                return 0.0
+            tokens = (await session.execute(select(refilled).where(table.c.key == key))).scalar_one()
+            await session.commit()
+        return (1 - tokens) / rate
+
+    async def add_failure(self, key: str, window: float) -> None:
+        async with self.session_factory() as session:
+            session.add(LoginFailure(key=key, failed_at=datetime.now(UTC)))
+            await session.execute(
+                delete(LoginFailure).where(
+                    LoginFailure.key == key,
+                    LoginFailure.failed_at < datetime.now(UTC) - timedelta(seconds=window),
+                )
+            )
+            await session.commit()
+
+    async def failures(self, key: str, window: float) -> tuple[int, float | None]:
+        since = datetime.now(UTC) - timedelta(seconds=window)
+        query = select(func.count(), func.min(LoginFailure.failed_at)).where(
+            LoginFailure.key == key,
+            LoginFailure.failed_at > since,
+        )
+        async with self.session_factory() as session:
+            count, oldest = (await session.execute(query)).one()
+        return count, oldest.timestamp() if oldest else None
+
+    async def reset_failures(self, key: str) -> None:
+        async with self.session_factory() as session:
+            await session.execute(delete(LoginFailure).where(LoginFailure.key == key))
+            await session.commit()
+
+
+class RedisThrottleBackend(ThrottleBackend):
+    """Общее состояние в Redis (или совместимом сервере). Требует пакет redis."""
+
+    CONSUME_SCRIPT = """
+    local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or ARGV[2])
+    local updated_at = tonumber(redis.call('HGET', KEYS[1], 'updated_at') or ARGV[3])
+    tokens = math.min(tonumber(ARGV[2]), tokens + (tonumber(ARGV[3]) - updated_at) * tonumber(ARGV[1]))
+    local retry_after = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        retry_after = (1 - tokens) / tonumber(ARGV[1])
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', ARGV[3])
+    redis.call('EXPIRE', KEYS[1], math.ceil((tonumber(ARGV[2]) - tokens) / tonumber(ARGV[1])) + 1)
+    return tostring(retry_after)
+    """
+
+    def __init__(self, url: str, prefix: str = "login-throttle:"):
+        try:
+            from redis.asyncio import Redis
+        except ImportError:
+            raise RuntimeError("LOGIN_THROTTLE_BACKEND=redis requires the redis extra: uv sync --extra redis")
+        self.redis = Redis.from_url(url)
+        self.prefix = prefix
+        self._consume = self.redis.register_script(self.CONSUME_SCRIPT)
+
+    async def consume(self, key: str, rate: float, burst: int) -> float:
+        retry_after = await self._consume(keys=[f"{self.prefix}bucket:{key}"], args=[rate, burst, time.time()])
+        return float(retry_after)
+
+    async def add_failure(self, key: str, window: float) -> None:
+        now = time.time()
+        redis_key = f"{self.prefix}failures:{key}"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(redis_key, {str(now): now})
+            pipe.zremrangebyscore(redis_key, 0, now - window)
+            pipe.expire(redis_key, math.ceil(window))
+            await pipe.execute()
+
+    async def failures(self, key: str, window: float) -> tuple[int, float | None]:
+        attempts = await self.redis.zrangebyscore(
+            f"{self.prefix}failures:{key}", time.time() - window, "+inf", withscores=True
+        )
+        return len(attempts), attempts[0][1] if attempts else None
+
+    async def reset_failures(self, key: str) -> None:
+        await self.redis.delete(f"{self.prefix}failures:{key}")
+
+
+class LoginThrottle:
+    """
+    Ограничитель попыток логина по username и по IP клиента.
+
+    Проверка выполняется до authenticate_user, поэтому отклоненная попытка не стоит ни запроса
+    в БД, ни bcrypt. Два механизма:
+    - token bucket: не больше `rate` попыток в секунду с запасом `burst`;
+    - штраф: после `max_failures` неудачных попыток за скользящее окно ключ блокируется,
+      пока самая старая из них не выйдет из окна. Успешный логин сбрасывает счетчик username.
+    """
+
+    def __init__(self, backend: ThrottleBackend):
+        self.backend = backend
+        self.rejected = 0
+
+    @staticmethod
+    def _keys(username: str, client_ip: str | None) -> list[tuple[str, float, int, int]]:
+        """Ключ IP - первым: попытка, отклоненная по IP, не тратит токены username жертвы."""
+        keys = []
+        if client_ip:
+            keys.append(
+                (
+                    f"ip:{client_ip}",
+                    settings.LOGIN_THROTTLE_IP_RATE,
+                    settings.LOGIN_THROTTLE_IP_BURST,
+                    settings.LOGIN_THROTTLE_IP_MAX_FAILURES,
+                )
+            )
+        keys.append(
+            (
+                f"user:{username.lower()}",
+                settings.LOGIN_THROTTLE_USERNAME_RATE,
+                settings.LOGIN_THROTTLE_USERNAME_BURST,
+                settings.LOGIN_THROTTLE_USERNAME_MAX_FAILURES,
+            )
+        )
+        return keys
+
+    async def check(self, username: str, client_ip: str | None) -> None:
+        """Поднимает LoginThrottled, если попытку нужно отклонить."""
+        window = settings.LOGIN_THROTTLE_FAILURE_WINDOW_SECONDS
+        keys = self._keys(username, client_ip)
+        # сначала штрафы, они ничего не списывают, затем bucket'ы: следующий - только если предыдущий разрешил
+        for key, _, _, max_failures in keys:
+            count, oldest = await self.backend.failures(key, window)
+            if count >= max_failures:
+                self.rejected += 1
+                raise LoginThrottled(oldest + window - time.time() if oldest else window)
+        for key, rate, burst, _ in keys:
+            retry_after = await self.backend.consume(key, rate, burst)
+            if retry_after > 0:
+                self.rejected += 1
+                raise LoginThrottled(retry_after)
+
+    async def register_failure(self, username: str, client_ip: str | None) -> None:
+        window = settings.LOGIN_THROTTLE_FAILURE_WINDOW_SECONDS
+        for key, *_ in self._keys(username, client_ip):
+            await self.backend.add_failure(key, window)
+
+    async def register_success(self, username: str) -> None:
+        await self.backend.reset_failures(f"user:{username.lower()}")
+
+    def clear(self) -> None:
+        self.backend.clear()
+        self.rejected = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {"backend": type(self.backend).__name__, "rejected": self.rejected}
+
+
+def build_throttle_backend() -> ThrottleBackend:
+    if settings.LOGIN_THROTTLE_BACKEND == "postgres":
+        return PostgresThrottleBackend(async_session_factory)
+    if settings.LOGIN_THROTTLE_BACKEND == "redis":
+        return RedisThrottleBackend(settings.LOGIN_THROTTLE_REDIS_URL)
+    return MemoryThrottleBackend()
+
+
+login_throttle = LoginThrottle(build_throttle_backend())
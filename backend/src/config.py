@@ -1,5 +1,5 @@
 import secrets
-from typing import Annotated, Any, Self
+from typing import Annotated, Any, Literal, Self
 
 from pydantic import (
     AnyUrl,
@@ -31,21 +31,66 @@ class PostgresDBSettings(BaseSettings):
     POSTGRES_PASSWORD: str = ""
     POSTGRES_DB: str = ""
     POSTGRES_ECHO: bool
-
-    @computed_field  # type: ignore[prop-decorator]
-    @property
-    def SQLALCHEMY_DATABASE_URI(self) -> PostgresDsn:
+    POSTGRES_DRIVER: Literal["psycopg", "asyncpg"] = "psycopg"
+    # asyncpg: кэш подготовленных выражений SQLAlchemy и собственный кэш asyncpg на соединение, 0 - выключен
+    POSTGRES_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    POSTGRES_STATEMENT_CACHE_SIZE: int = 100
+    # psycopg: запрос готовится на сервере после N выполнений на соединении, None - никогда
+    POSTGRES_PREPARE_THRESHOLD: int | None = 5
+    # пул соединений на воркер (см. src/pool.py и /utils/pool-stats)
+    POSTGRES_POOL_SIZE: int = 5
+    POSTGRES_MAX_OVERFLOW: int = 10
+    POSTGRES_POOL_TIMEOUT: float = 30  # ожидание свободного соединения, секунд
+    POSTGRES_POOL_RECYCLE: int = -1  # пересоздавать соединения старше N секунд, -1 - никогда
+    # True - SELECT 1 при каждой выдаче соединения; False - разорванное соединение обнаруживается
+    # ошибкой запроса и инвалидирует пул (дешевле, если есть POSTGRES_POOL_RECYCLE)
+    POSTGRES_POOL_PRE_PING: bool = True
+    POSTGRES_POOL_USE_LIFO: bool = False  # LIFO держит горячими меньше соединений, лишние закрываются по recycle
+    # работа через PgBouncer в режиме transaction: пул держит PgBouncer, у воркера NullPool (0)
+    # или маленький пул без overflow, pre-ping выключен, подготовленные выражения безопасны для PgBouncer
+    POSTGRES_PGBOUNCER: bool = False
+    POSTGRES_PGBOUNCER_POOL_SIZE: int = 0
+    # реплики только для чтения, "host" или "host:port" через запятую (см. src/replicas.py)
+    POSTGRES_REPLICA_SERVERS: Annotated[list[str] | str, BeforeValidator(parse_cors)] = []
+    POSTGRES_REPLICA_MAX_LAG_SECONDS: float = 5  # при большем отставании чтение идет на primary
+    POSTGRES_REPLICA_LAG_CHECK_SECONDS: float = 2
+    POSTGRES_REPLICA_STICKY_SECONDS: int = 10  # сколько клиент читает с primary после записи
+    # учет SQL на запрос (см. src/query_stats.py): лог медленных выражений и вероятных N+1
+    POSTGRES_SLOW_QUERY_SECONDS: float = 0.5
+    POSTGRES_REPEATED_QUERY_THRESHOLD: int = 10  # одно выражение столько раз за запрос - вероятно N+1
+
+    def database_uri(self, host: str, port: int, driver: str | None = None, database: str | None = None) -> str:
         return str(
             MultiHostUrl.build(
-                scheme="postgresql+psycopg",
+                scheme=f"postgresql+{driver or self.POSTGRES_DRIVER}",
                 username=self.POSTGRES_USER,
                 password=self.POSTGRES_PASSWORD,
-                host=self.POSTGRES_SERVER,
-                port=self.POSTGRES_PORT,
-                path=self.POSTGRES_DB,
+                host=host,
+                port=port,
+                path=database or self.POSTGRES_DB,
             )
         )
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_DATABASE_URI(self) -> PostgresDsn:
+        return self.database_uri(self.POSTGRES_SERVER, self.POSTGRES_PORT)
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_MIGRATIONS_URI(self) -> PostgresDsn:
+        """Alembic работает синхронно, поэтому всегда через psycopg."""
+        return self.database_uri(self.POSTGRES_SERVER, self.POSTGRES_PORT, driver="psycopg")
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_REPLICA_URIS(self) -> list[str]:
+        uris = []
+        for server in self.POSTGRES_REPLICA_SERVERS:
+            host, _, port = server.partition(":")
+            uris.append(self.database_uri(host, int(port) if port else self.POSTGRES_PORT))
+        return uris
+
 
 class EmailConfig(BaseSettings):
     PROJECT_NAME: str
@@ -78,9 +123,45 @@ class Settings(BaseSettings):
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
     ALGORITHM: str = "HS256"
+    # файл или каталог с ключами JWT (см. src/auth/keys.py); без него токены подписываются SECRET_KEY
+    JWT_KEYS_PATH: str | None = None
+    JWT_KEYS_RELOAD_SECONDS: int = 30
     FIRST_SUPERUSER: str
     FIRST_SUPERUSER_EMAIL: EmailStr
     FIRST_SUPERUSER_PASSWORD: str
+    # кэш аутентифицированных пользователей (см. src/users/cache.py), 0 - выключен
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10_000
+    # последние известные версии прав пользователей (см. src/users/authz.py), для проверки claim `authz`
+    AUTHZ_CACHE_MAX_SIZE: int = 100_000
+    # отзыв токенов (см. src/auth/revocation.py)
+    TOKEN_REVOCATION_REFRESH_SECONDS: int = 5
+    TOKEN_REVOCATION_RELOAD_SECONDS: int = 60 * 60
+    TOKEN_REVOCATION_REFRESH_OVERLAP_SECONDS: int = 60
+    # ограничение попыток логина (см. src/auth/throttling.py)
+    LOGIN_THROTTLE_BACKEND: Literal["memory", "postgres", "redis"] = "memory"
+    LOGIN_THROTTLE_REDIS_URL: str = "redis://localhost:6379/0"
+    LOGIN_THROTTLE_USERNAME_RATE: float = 0.2  # попыток в секунду
+    LOGIN_THROTTLE_USERNAME_BURST: int = 5
+    LOGIN_THROTTLE_USERNAME_MAX_FAILURES: int = 5
+    LOGIN_THROTTLE_IP_RATE: float = 2.0
+    LOGIN_THROTTLE_IP_BURST: int = 20
+    LOGIN_THROTTLE_IP_MAX_FAILURES: int = 50
+    LOGIN_THROTTLE_FAILURE_WINDOW_SECONDS: int = 15 * 60
+    # кэш проверенных access-токенов (см. src/auth/cache.py), 0 - выключен
+    JWT_CACHE_MAX_SIZE: int = 10_000
+    # стоимость bcrypt, подбирается командой python -m src.auth.calibrate; None - значение passlib по умолчанию
+    BCRYPT_ROUNDS: int | None = None
+    # пул для bcrypt (см. src/auth/hashing.py)
+    PASSWORD_HASHER_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASHER_MAX_WORKERS: int = 4
+    PASSWORD_HASHER_MAX_QUEUE: int = 64
+    # импорт пользователей (см. src/users/importer.py)
+    USER_IMPORT_CHUNK_SIZE: int = 1000
+    USER_IMPORT_MAX_REPORTED_ERRORS: int = 1000
+    USER_IMPORT_HASHER_MAX_WORKERS: int = 4
+    # выгрузка пользователей: строк за одно чтение серверного курсора (см. src/users/exporter.py)
+    USER_EXPORT_FETCH_SIZE: int = 1000
 
 
 settings = [
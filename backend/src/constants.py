@@ -27,6 +27,19 @@ class Environment(str, Enum):
         return self == self.LOCAL
 
 
+class TotalMode(str, Enum):
+    """Как считать общее количество строк для постраничного списка (см. models.paginate)."""
+
+    exact = "exact"  # отдельный count(*)
+    window = "window"  # count(*) OVER () в том же запросе
+    estimated = "estimated"  # оценка планировщика по EXPLAIN запроса, с учетом фильтров
+
+
+class SortOrder(str, Enum):
+    asc = "asc"
+    desc = "desc"
+
+
 def new_uuid() -> str:
     return str(uuid4())
 
@@ -40,3 +53,4 @@ def get_project_root() -> str:
 
 
 EMAILS_DISABLED = "Emails are disabled"
+INVALID_CURSOR = "Invalid pagination cursor"
@@ -1,39 +1,182 @@
 # TODO: Допиши в функцию init_db создание суперюзера после создания моделей юзера
 
-from collections.abc import AsyncGenerator
-from typing import Annotated
-
-from fastapi import Depends
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import uuid
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from typing import Annotated, Any
+
+from fastapi import Depends, Request, Response
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src import query_stats
 from src.config import settings
-
-engine = create_async_engine(
-    settings.SQLALCHEMY_DATABASE_URI,
-    future=True,
-    echo=settings.POSTGRES_ECHO,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
+from src.pool import PoolStats
+from src.replicas import SAFE_METHODS, Replica, ReplicaRouter
+
+
+def driver_connect_args(driver: str) -> dict[str, Any]:
+    """Настройки подготовленных выражений драйвера (POSTGRES_DRIVER)."""
+    if driver == "asyncpg":
+        if settings.POSTGRES_PGBOUNCER:
+            # соединение с сервером меняется от транзакции к транзакции: без кэшей и с уникальными
+            # именами, чтобы выражения разных клиентов не конфликтовали на одном серверном соединении
+            return {
+                "prepared_statement_cache_size": 0,
+                "statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4().hex}__",
+            }
+        return {
+            "prepared_statement_cache_size": settings.POSTGRES_PREPARED_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.POSTGRES_STATEMENT_CACHE_SIZE,
+        }
+    if settings.POSTGRES_PGBOUNCER:
+        return {"prepare_threshold": None}
+    return {"prepare_threshold": settings.POSTGRES_PREPARE_THRESHOLD}
+
+
+def pool_options() -> tuple[type[Pool], dict[str, Any]]:
+    """Класс пула и его параметры для create_async_engine."""
+    if not settings.POSTGRES_PGBOUNCER:
+        return AsyncAdaptedQueuePool, {
+            "pool_size": settings.POSTGRES_POOL_SIZE,
+            "max_overflow": settings.POSTGRES_MAX_OVERFLOW,
+            "pool_timeout": settings.POSTGRES_POOL_TIMEOUT,
+            "pool_recycle": settings.POSTGRES_POOL_RECYCLE,
+            "pool_pre_ping": settings.POSTGRES_POOL_PRE_PING,
+            "pool_use_lifo": settings.POSTGRES_POOL_USE_LIFO,
+        }
+    if settings.POSTGRES_PGBOUNCER_POOL_SIZE <= 0:
+        return NullPool, {}
+    # соединение с PgBouncer дешевое, проверять его pre-ping незачем
+    return AsyncAdaptedQueuePool, {
+        "pool_size": settings.POSTGRES_PGBOUNCER_POOL_SIZE,
+        "max_overflow": 0,
+        "pool_timeout": settings.POSTGRES_POOL_TIMEOUT,
+        "pool_recycle": settings.POSTGRES_POOL_RECYCLE,
+        "pool_pre_ping": False,
+    }
+
+
+def build_engine(uri: str, pool_stats: PoolStats, driver: str = settings.POSTGRES_DRIVER) -> AsyncEngine:
+    pool_class, pool_kwargs = pool_options()
+    engine = create_async_engine(
+        uri,
+        future=True,
+        echo=settings.POSTGRES_ECHO,
+        connect_args=driver_connect_args(driver),
+        poolclass=pool_stats.instrument(pool_class),
+        **pool_kwargs,
+    )
+    pool_stats.attach(engine)
+    query_stats.instrument(engine.sync_engine)
+    return engine
+
+
+def build_replica(name: str, uri: str) -> Replica:
+    pool_stats = PoolStats(name)
+    engine = build_engine(uri, pool_stats)
+    return Replica(name, engine, async_sessionmaker(engine, expire_on_commit=False), pool_stats)
+
+
+pool_stats = PoolStats("primary")
+engine = build_engine(settings.SQLALCHEMY_DATABASE_URI, pool_stats)
+async_session_factory = async_sessionmaker(engine, expire_on_commit=False)
+replica_router = ReplicaRouter(
+    [build_replica(f"replica{i}", uri) for i, uri in enumerate(settings.SQLALCHEMY_REPLICA_URIS, start=1)],
+    max_lag=settings.POSTGRES_REPLICA_MAX_LAG_SECONDS,
+    sticky_seconds=settings.POSTGRES_REPLICA_STICKY_SECONDS,
+    check_seconds=settings.POSTGRES_REPLICA_LAG_CHECK_SECONDS,
 )
 
 
+def all_pool_stats() -> list[PoolStats]:
+    return [pool_stats, *(replica.pool_stats for replica in replica_router.replicas)]
+
+
 async def init_db(session: AsyncSession):
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
 
 
-async def get_session() -> AsyncGenerator[AsyncSession, None, None]:
-    async_session = async_sessionmaker(engine, expire_on_commit=False)
-    async with async_session() as session:
+async def get_session(request: Request, response: Response) -> AsyncGenerator[AsyncSession, None, None]:
+    """
+    Unit of work запроса: одна сессия и одна транзакция на весь запрос, общая для всех зависимостей.
+
+    CRUD-методы только отправляют изменения (flush), фиксирует их единственный commit при выходе
+    из зависимости. Исключение в обработчике (в том числе HTTPException) откатывает весь запрос.
+    Вложенные операции, ошибка которых не должна откатывать запрос, оборачиваются в
+    `session.begin_nested()` (SAVEPOINT).
+    """
+    if request.method not in SAFE_METHODS:
+        replica_router.stick(response)
+    async with async_session_factory() as session, session.begin():
         yield session
 
 
+@asynccontextmanager
+async def rollback_transaction(bind: AsyncEngine) -> AsyncIterator[AsyncConnection]:
+    """
+    Тестовый режим: все сессии async_session_factory работают на одном соединении bind внутри
+    внешней транзакции, которая откатывается при выходе, - тест не оставляет строк в базе.
+
+    Транзакция сессии (`session.begin()` в get_session и т.п.) становится SAVEPOINT: commit отпускает
+    его и вызывает колбэки on_commit, ошибка откатывает только его. Соединение одно, поэтому
+    запросы к БД внутри теста не должны выполняться конкурентно.
+    """
+    async with bind.connect() as connection:
+        transaction = await connection.begin()
+        async_session_factory.configure(bind=connection, join_transaction_mode="create_savepoint")
+        try:
+            yield connection
+        finally:
+            async_session_factory.configure(bind=engine, join_transaction_mode="conservative_savepoint")
+            await transaction.rollback()
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """Выполняет callback после успешного commit транзакции сессии (сброс кэшей и т.п.)."""
+    session.info.setdefault("on_commit", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_on_commit(session: Session) -> None:
+    if session.in_nested_transaction():  # RELEASE SAVEPOINT - транзакция еще не зафиксирована
+        return
+    for callback in session.info.pop("on_commit", []):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_on_commit(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    session.info.pop("on_commit", None)
+
+
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
 
 
+async def get_read_session(request: Request, session: SessionDep) -> AsyncGenerator[AsyncSession, None, None]:
+    """
+    Сессия для обработчиков только на чтение: реплика, если она доступна для запроса (см. ReplicaRouter),
+    иначе та же сессия primary, что и SessionDep. Соединение сессия берет только при первом запросе к БД.
+    """
+    replica = replica_router.choose(request)
+    if replica is None:
+        yield session
+        return
+    async with replica.session_factory() as read_session, read_session.begin():
+        yield read_session
+
+
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
+
+
 # class BaseTable(SQLModel, # идея была хорошая, но споткнулась на переиспользование схем в моделях таблиц
 #     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
 #     created_at: datetime = Field(server_default=func.now())
@@ -61,13 +204,11 @@ def connection(method):
     """
 
     async def wrapper(*args, **kwargs):
-        async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        async with async_session_factory() as session:
             try:
-                # Явно не открываем транзакции, так как они уже есть в контексте
-                return await method(*args, session=session, **kwargs)
-            except Exception as e:
-                await session.rollback()  # Откатываем сессию при ошибке
-                raise e  # Поднимаем исключение дальше
+                # Транзакция на весь вызов, CRUD-методы внутри только делают flush
+                async with session.begin():
+                    return await method(*args, session=session, **kwargs)
             finally:
                 await session.close()  # Закрываем сессию
 
@@ -1,5 +1,7 @@
 from fastapi import status
 
+from src.constants import INVALID_CURSOR
+
 
 class CRUDError(Exception):
     pass
@@ -9,6 +11,10 @@ class ObjectNotFoundError(CRUDError):
     pass
 
 
+class InvalidCursor(CRUDError):
+    pass
+
+
 class HTTPResponseException(Exception):
     """
     Base class for all HTTP exceptions.
@@ -30,3 +36,8 @@ class HTTPResponseException(Exception):
 class EmailsDisabledException(HTTPResponseException):
     def __init__(self, detail=None, headers=None):
         super().__init__(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class InvalidCursorException(HTTPResponseException):
+    def __init__(self):
+        super().__init__(detail=INVALID_CURSOR, status_code=status.HTTP_400_BAD_REQUEST)
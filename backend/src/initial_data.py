@@ -2,9 +2,7 @@
 import asyncio
 import logging
 
-from sqlmodel.ext.asyncio.session import AsyncSession
-
-from src.db import engine, init_db
+from src.db import async_session_factory, init_db
 from src.users.service import create_superuser
 
 logging.basicConfig(level=logging.INFO)
@@ -12,7 +10,7 @@ logger = logging.getLogger(__name__)
 
 
 async def init() -> None:
-    async with AsyncSession(engine, expire_on_commit=False) as session:
+    async with async_session_factory() as session, session.begin():
         await init_db(session)
         await create_superuser(session)
 
@@ -1,13 +1,25 @@
-from collections.abc import AsyncGenerator
+import asyncio
+import logging
+from collections.abc import AsyncGenerator, AsyncIterator
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.exception_handlers import http_exception_handler
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.routing import APIRoute
 
+from src.auth.exceptions import PasswordHasherBusy, PasswordHasherBusyException
+from src.auth.hashing import import_password_hasher, password_hasher
+from src.auth.keys import warn_if_secret_not_shared
+from src.auth.revocation import token_denylist
 from src.config import app_configs, settings
+from src.db import async_session_factory, replica_router
 from src.initial_data import init
+from src.query_stats import QueryStats, track_queries
 from src.router import router
+from src.users.roles import role_registry
+
+logger = logging.getLogger(__name__)
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -19,7 +31,18 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
     # добавить редис, селери и пр.
     if settings.ENVIRONMENT.is_local:
         await init()
+    warn_if_secret_not_shared()
+    async with async_session_factory() as session:
+        await token_denylist.load(session)
+        await role_registry.load(session)
+    denylist_refresher = asyncio.create_task(token_denylist.run(async_session_factory))
+    await replica_router.check_lag()
+    lag_monitor = asyncio.create_task(replica_router.run())
     yield
+    lag_monitor.cancel()
+    denylist_refresher.cancel()
+    password_hasher.shutdown()
+    import_password_hasher.shutdown()
 
 
 app = FastAPI(
@@ -44,6 +67,38 @@ if settings.all_cors_origins:
         ],
     )
 
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return await http_exception_handler(request, HTTPException(**PasswordHasherBusyException().dict()))
+
+
+@app.middleware("http")
+async def query_stats_middleware(request: Request, call_next):
+    """
+    Учет SQL запроса: предупреждение о вероятном N+1, в отладочных окружениях - заголовок Server-Timing.
+
+    Тело ответа (StreamingResponse, например /users/export) отдается уже после call_next, его
+    запросы тоже попадают в stats, поэтому N+1 проверяется после отправки тела. Заголовки уходят
+    раньше тела: Server-Timing потокового ответа учитывает только запросы до начала отдачи.
+    """
+    with track_queries() as stats:
+        response = await call_next(request)
+    if settings.ENVIRONMENT.is_debug:
+        response.headers["Server-Timing"] = stats.server_timing()
+    response.body_iterator = _check_repeated_after_body(response.body_iterator, request, stats)
+    return response
+
+
+async def _check_repeated_after_body(
+    body: AsyncIterator[bytes], request: Request, stats: QueryStats
+) -> AsyncIterator[bytes]:
+    async for chunk in body:
+        yield chunk
+    if repeated := stats.repeated():
+        logger.warning(f"Possible N+1 in {request.method} {request.url.path}: {repeated}")
+
+
 app.include_router(router)
 
 
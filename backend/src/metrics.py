@@ -0,0 +1,45 @@
+import threading
+from collections.abc import Iterable
+from typing import Any
+
+
+class TimingStats:
+    """Счетчик длительностей: количество, сумма, максимум (секунды)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "avg_ms": round(self.avg * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+def prometheus_text(samples: Iterable[tuple[str, str, str, dict[str, str], float]]) -> str:
+    """Текстовый формат экспозиции Prometheus из (имя, тип, описание, метки, значение)."""
+    lines = []
+    seen = set()
+    for name, kind, description, labels, value in sorted(samples, key=lambda sample: sample[0]):
+        if name not in seen:
+            seen.add(name)
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+        label_text = ",".join(f'{key}="{label}"' for key, label in labels.items())
+        lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    return "\n".join(lines) + "\n"
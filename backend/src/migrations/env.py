@@ -34,7 +34,7 @@ target_metadata = SQLModel.metadata
 
 
 def get_url():
-    return str(settings.SQLALCHEMY_DATABASE_URI)
+    return str(settings.SQLALCHEMY_MIGRATIONS_URI)
 
 
 def run_migrations_offline() -> None:
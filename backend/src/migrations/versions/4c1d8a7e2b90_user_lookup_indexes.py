@@ -0,0 +1,61 @@
+"""user lookup indexes
+
+Revision ID: 4c1d8a7e2b90
+Revises: 92f96c02ff1d
+Create Date: 2025-05-20 12:41:07.518302
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4c1d8a7e2b90"  # pragma: allowlist secret
+down_revision: Union[str, None] = "92f96c02ff1d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокирует запись в user на время построения, но не работает внутри транзакции
+    with op.get_context().autocommit_block():
+        # страницы списка активных пользователей: WHERE is_active ORDER BY username, id
+        op.create_index(
+            "ix_user_active_username_id",
+            "user",
+            ["username", "id"],
+            unique=False,
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # поиск по email без учета регистра (UserCRUD.get_by_email)
+        op.create_index(
+            "ix_user_email_lower",
+            "user",
+            [sa.text("lower(email)")],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # внешний ключ: фильтр по роли и проверка RESTRICT при удалении роли
+        op.create_index(
+            op.f("ix_user_role_id"),
+            "user",
+            ["role_id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f("ix_user_role_id"), table_name="user", postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_user_email_lower", table_name="user", postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_user_active_username_id", table_name="user", postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,53 @@
+"""login throttle
+
+Revision ID: 92f96c02ff1d
+Revises: 35587bed9e5d
+Create Date: 2025-05-16 18:24:31.904216
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = "92f96c02ff1d"  # pragma: allowlist secret
+down_revision: Union[str, None] = "35587bed9e5d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # UNLOGGED: состояние ограничителя не нужно переживать падение сервера, а запись дешевле
+    op.create_table(
+        "logintokenbucket",
+        sa.Column("key", sqlmodel.sql.sqltypes.AutoString(length=320), nullable=False),
+        sa.Column("tokens", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+        prefixes=["UNLOGGED"],
+    )
+    op.create_table(
+        "loginfailure",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("key", sqlmodel.sql.sqltypes.AutoString(length=320), nullable=False),
+        sa.Column("failed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        prefixes=["UNLOGGED"],
+    )
+    op.create_index(op.f("ix_loginfailure_key"), "loginfailure", ["key"], unique=False)
+    op.create_index(
+        op.f("ix_loginfailure_failed_at"), "loginfailure", ["failed_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_loginfailure_failed_at"), table_name="loginfailure")
+    op.drop_index(op.f("ix_loginfailure_key"), table_name="loginfailure")
+    op.drop_table("loginfailure")
+    op.drop_table("logintokenbucket")
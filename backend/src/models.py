@@ -1,16 +1,37 @@
+import base64
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Any, TypeVar
 
+from sqlalchemy import column, literal, literal_column, table, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.sql import Select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import ClauseElement, Executable, Select
+from sqlalchemy.sql.base import ExecutableOption
 from sqlmodel import SQLModel, delete, func, select, update
 
+from src.constants import SortOrder, TotalMode
 from src.db import connection
+from src.exceptions import InvalidCursor
 
 Table = TypeVar("Table", bound=SQLModel)
 
+# лимит параметров одного запроса в протоколе PostgreSQL - 65535, берем с запасом
+MAX_QUERY_PARAMETERS = 32_000
+
 
 class CRUDBase:
+    """
+    Базовые CRUD-операции. Транзакцией управляет вызывающий (unit of work запроса, см. get_session):
+    методы только отправляют изменения в БД (flush), commit не делают.
+    """
+
     table: type[Table]
 
     # @classmethod
@@ -29,13 +50,15 @@ class CRUDBase:
         created_fields = {k: v for k, v in kwargs.items() if getattr(cls.table, k, None) is not None}
         instance = cls.table(**created_fields)
         session.add(instance)
-        await session.commit()
-        await session.refresh(instance)
+        await session.flush()
         return instance
 
     @classmethod
-    async def get(cls, session: AsyncSession, field: str, value: Any) -> Table | None:
-        query = select(cls.table).where(getattr(cls.table, field) == value)
+    async def get(
+        cls, session: AsyncSession, field: str, value: Any, options: Sequence[ExecutableOption] = ()
+    ) -> Table | None:
+        """options - опции загрузки связей (selectinload, joinedload), по умолчанию связи не загружаются."""
+        query = select(cls.table).where(getattr(cls.table, field) == value).options(*options)
         return await exactly_one(session, query)
 
     @classmethod
@@ -43,17 +66,112 @@ class CRUDBase:
         updated_fields = {k: v for k, v in kwargs.items() if getattr(cls.table, k, None) is not None}
         query = update(cls.table).where(getattr(cls.table, field) == value).values(**updated_fields)
         await session.execute(query)
-        await session.commit()
 
     @classmethod
     async def delete(cls, session: AsyncSession, field: str, value: Any) -> None:
         query = delete(cls.table).where(getattr(cls.table, field) == value)
         await session.execute(query)
-        await session.commit()
 
+    @classmethod
+    def _returning(cls, returning: tuple | None) -> tuple:
+        return returning or tuple(cls.table.__table__.primary_key.columns)
 
-async def get_list(session: AsyncSession, query: Select) -> list[Table]:
-    return (await session.execute(query)).unique().scalars().all()
+    @classmethod
+    async def bulk_create(
+        cls, session: AsyncSession, rows: list[dict[str, Any]], returning: tuple | None = None
+    ) -> list[Row]:
+        """
+        Многострочный INSERT ... ON CONFLICT DO NOTHING. Строки, нарушающие любое уникальное
+        ограничение, пропускаются; возвращаются колонки `returning` (по умолчанию первичный ключ) вставленных.
+        У всех строк одинаковый набор полей.
+        """
+        if not rows:
+            return []
+        batch_size = max(1, MAX_QUERY_PARAMETERS // len(rows[0]))
+        inserted = []
+        for start in range(0, len(rows), batch_size):
+            query = (
+                insert(cls.table)
+                .values(rows[start : start + batch_size])
+                .on_conflict_do_nothing()
+                .returning(*cls._returning(returning))
+            )
+            inserted += (await session.execute(query)).all()
+        return inserted
+
+    @classmethod
+    async def bulk_upsert(
+        cls,
+        session: AsyncSession,
+        rows: list[dict[str, Any]],
+        index_elements: list[str],
+        update_fields: list[str],
+        update_values: dict[str, Any] | None = None,
+        returning: tuple | None = None,
+    ) -> list[Row]:
+        """
+        Многострочный INSERT ... ON CONFLICT (index_elements) DO UPDATE.
+
+        update_fields берутся из вставляемой строки, update_values - дополнительные выражения над
+        существующей строкой (например, инкремент счетчика). К возвращаемым колонкам добавляется
+        признак `inserted`: True - строка новая, False - обновлена. Конфликт по другому уникальному
+        ограничению поднимает IntegrityError на всю пачку.
+        """
+        if not rows:
+            return []
+        batch_size = max(1, MAX_QUERY_PARAMETERS // len(rows[0]))
+        result = []
+        for start in range(0, len(rows), batch_size):
+            query = insert(cls.table).values(rows[start : start + batch_size])
+            set_ = {name: query.excluded[name] for name in update_fields} | (update_values or {})
+            query = query.on_conflict_do_update(index_elements=index_elements, set_=set_).returning(
+                *cls._returning(returning), literal_column("xmax = 0").label("inserted")
+            )
+            result += (await session.execute(query)).all()
+        return result
+
+    @classmethod
+    async def copy_create(
+        cls, session: AsyncSession, rows: list[dict[str, Any]], returning: tuple | None = None
+    ) -> list[Row]:
+        """
+        То же, что bulk_create, но строки передаются через COPY во временную таблицу и переносятся
+        одним INSERT ... SELECT ... ON CONFLICT DO NOTHING: быстрее на больших пачках и без лимита параметров.
+        """
+        if not rows:
+            return []
+        source = cls.table.__table__
+        columns = list(rows[0])
+        connection = await session.connection()
+        preparer = connection.dialect.identifier_preparer
+        staging_name = f"_copy_{source.name}"
+        staging = preparer.quote(staging_name)
+        await session.execute(
+            text(f"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {preparer.format_table(source)}) ON COMMIT DROP")
+        )
+        await session.execute(text(f"TRUNCATE {staging}"))
+        records = [tuple(row[name] for name in columns) for row in rows]
+        driver_connection = (await connection.get_raw_connection()).driver_connection
+        if connection.dialect.driver == "asyncpg":
+            await driver_connection.copy_records_to_table(staging_name, records=records, columns=columns)
+        else:
+            column_list = ", ".join(preparer.quote(name) for name in columns)
+            async with driver_connection.cursor() as cursor:
+                async with cursor.copy(f"COPY {staging} ({column_list}) FROM STDIN") as copy:
+                    for record in records:
+                        await copy.write_row(record)
+        staging_table = table(staging_name, *(column(name) for name in columns))
+        query = (
+            insert(cls.table)
+            .from_select(columns, select(*staging_table.columns))
+            .on_conflict_do_nothing()
+            .returning(*cls._returning(returning))
+        )
+        return (await session.execute(query)).all()
+
+
+async def get_list(session: AsyncSession, query: Select, options: Sequence[ExecutableOption] = ()) -> list[Table]:
+    return (await session.execute(query.options(*options))).unique().scalars().all()
 
 
 async def exactly_one(session: AsyncSession, query) -> Table | None:
@@ -64,7 +182,126 @@ async def exactly_one(session: AsyncSession, query) -> Table | None:
 
 
 async def get_total_rows(session: AsyncSession, query: Select) -> int:
-    return (await session.execute(select(func.count()).select_from(query.subquery()))).scalars().one()
+    return (await session.execute(select(func.count()).select_from(query.order_by(None).subquery()))).scalars().one()
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) запроса, параметры передаются как у самого запроса."""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler: Any, **kw: Any) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def estimate_total_rows(session: AsyncSession, query: Select) -> int:
+    """Оценка числа строк запроса (с его фильтрами) по плану, без выполнения: статистика колонок, не count(*)."""
+    plan = (await session.execute(Explain(query.order_by(None)))).scalar_one()
+    if isinstance(plan, str):  # asyncpg отдает json строкой, psycopg - разобранным
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+@dataclass
+class Page[T]:
+    items: list[T]
+    total: int
+    next_cursor: str | None
+
+
+def encode_cursor(sort: str, order: SortOrder, values: list[Any]) -> str:
+    payload = json.dumps([sort, order.value, *values], default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _python_type(column_type: Any) -> type:
+    try:
+        return column_type.python_type
+    except NotImplementedError:  # TypeDecorator без python_type, например AutoString из sqlmodel
+        return getattr(column_type, "impl_instance", column_type.impl).python_type
+
+
+def decode_cursor(cursor: str, sort: str, order: SortOrder, columns: list[Any]) -> list[Any]:
+    """Значения ключей из курсора. Курсор от другой сортировки или испорченный - InvalidCursor."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        cursor_sort, cursor_order, *values = payload
+        if (cursor_sort, cursor_order) != (sort, order.value) or len(values) != len(columns):
+            raise ValueError("cursor does not match sort")
+        parsed = []
+        for column, value in zip(columns, values, strict=True):
+            python_type = _python_type(column.type)
+            if value is None or isinstance(value, python_type):
+                parsed.append(value)
+            elif issubclass(python_type, datetime):
+                parsed.append(datetime.fromisoformat(value))
+            else:
+                parsed.append(python_type(value))
+        return parsed
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+async def paginate(
+    session: AsyncSession,
+    query: Select,
+    *,
+    sort: str = "id",
+    order: SortOrder = SortOrder.asc,
+    limit: int = 100,
+    cursor: str | None = None,
+    total: TotalMode = TotalMode.exact,
+) -> Page:
+    """
+    Keyset-пагинация: страница строк после курсора в порядке (sort, id).
+
+    Глубина страницы не влияет на стоимость запроса, в отличие от OFFSET. Колонка sort должна быть
+    NOT NULL, для быстрого запроса нужен индекс по ней. Курсор непрозрачный, содержит сортировку
+    и значения ключей последней строки; next_cursor None - страница последняя. Общее количество
+    считается по режиму `total`, на первой неполной странице - без дополнительных запросов.
+    """
+    model = query.column_descriptions[0]["entity"]
+    query = query.order_by(None)
+    if total is TotalMode.window:
+        subquery = query.add_columns(func.count().over().label("total_rows")).subquery()
+        entity = aliased(model, subquery)
+        page_query = select(entity, subquery.c.total_rows)
+    else:
+        entity, page_query = model, query
+    names = [sort] if sort == "id" else [sort, "id"]
+    keys = [getattr(entity, name) for name in names]
+    descending = order is SortOrder.desc
+    if cursor is not None:
+        columns = [getattr(model, name) for name in names]
+        values = decode_cursor(cursor, sort, order, columns)
+        values = [literal(value, column.type) for column, value in zip(columns, values, strict=True)]
+        after = tuple_(*keys) < tuple_(*values) if descending else tuple_(*keys) > tuple_(*values)
+        page_query = page_query.where(after)
+    page_query = page_query.order_by(*(key.desc() if descending else key.asc() for key in keys)).limit(limit + 1)
+
+    result = (await session.execute(page_query)).unique()
+    if total is TotalMode.window:
+        rows = result.all()
+        items, total_rows = [row[0] for row in rows], rows[0][1] if rows else None
+    else:
+        items, total_rows = list(result.scalars().all()), None
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(sort, order, [getattr(items[-1], name) for name in names])
+    if cursor is None and next_cursor is None:
+        total_rows = len(items)
+    elif total is TotalMode.estimated:
+        total_rows = await estimate_total_rows(session, query)
+    if total_rows is None:
+        total_rows = await get_total_rows(session, query)
+    return Page(items=items, total=total_rows, next_cursor=next_cursor)
 
 
 # Generic message
@@ -0,0 +1,124 @@
+import os
+import time
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from src.metrics import TimingStats
+
+
+class InstrumentedPoolMixin:
+    """Замеряет время получения соединения из пула (ожидание свободного + connect/pre-ping) и таймауты."""
+
+    pool_stats: "PoolStats"
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.pool_stats.timeouts += 1
+            raise
+        finally:
+            self.pool_stats.checkout_wait.observe(time.perf_counter() - start)
+
+
+class PoolStats:
+    """
+    Метрики пула соединений одного engine.
+
+    Счетчики ведутся по событиям пула SQLAlchemy, текущая загрузка (in_use, overflow, idle)
+    читается из самого пула. Пул создается классом `pool_class`, иначе время ожидания
+    соединения и таймауты не учитываются. Метрики относятся к процессу: у каждого воркера свой пул.
+    """
+
+    def __init__(self, name: str, base: type[Pool] = AsyncAdaptedQueuePool):
+        self.name = name
+        self.pool_class = self.instrument(base)
+        self.checkout_wait = TimingStats()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.max_in_use = 0
+        self._engine = None
+
+    def instrument(self, base: type[Pool]) -> type[Pool]:
+        """Класс пула с замером ожидания; сохраняется при пересоздании пула (engine.dispose) вместе со ссылкой на метрики."""
+        return type(f"Instrumented{base.__name__}", (InstrumentedPoolMixin, base), {"pool_stats": self})
+
+    def attach(self, engine: AsyncEngine) -> None:
+        self._engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+        event.listen(self._engine, "connect", self._on_connect)
+        event.listen(self._engine, "checkout", self._on_checkout)
+        event.listen(self._engine, "checkin", self._on_checkin)
+        event.listen(self._engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self.checkouts += 1
+        in_use = self.in_use
+        if in_use is not None and in_use > self.max_in_use:
+            self.max_in_use = in_use
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        self.checkins += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self.invalidations += 1
+
+    def _gauge(self, method: str) -> int | None:
+        pool = self._engine.pool if self._engine is not None else None
+        return getattr(pool, method)() if hasattr(pool, method) else None
+
+    @property
+    def in_use(self) -> int | None:
+        return self._gauge("checkedout")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": self._gauge("size"),
+            "in_use": self.in_use,
+            "idle": self._gauge("checkedin"),
+            "overflow": self._gauge("overflow"),
+            "max_in_use": self.max_in_use,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "checkout_wait": self.checkout_wait.stats(),
+        }
+
+    def samples(self) -> list[tuple[str, str, str, dict[str, str], float]]:
+        """Метрики в виде (имя, тип, описание, метки, значение) для prometheus_text."""
+        labels = {"pool": self.name, "worker": str(os.getpid())}
+        samples = [
+            ("db_pool_checkouts_total", "counter", "Connections checked out.", self.checkouts),
+            ("db_pool_connects_total", "counter", "New database connections opened.", self.connects),
+            ("db_pool_invalidations_total", "counter", "Connections invalidated.", self.invalidations),
+            ("db_pool_timeouts_total", "counter", "Checkouts that hit pool timeout.", self.timeouts),
+            (
+                "db_pool_checkout_wait_seconds_total",
+                "counter",
+                "Time spent acquiring connections.",
+                self.checkout_wait.total,
+            ),
+            ("db_pool_checkout_wait_max_seconds", "gauge", "Longest connection acquisition.", self.checkout_wait.max),
+            ("db_pool_max_in_use", "gauge", "Peak connections checked out at once.", self.max_in_use),
+        ]
+        for name, method, description in (
+            ("db_pool_size", "size", "Configured pool size."),
+            ("db_pool_in_use", "checkedout", "Connections currently checked out."),
+            ("db_pool_idle", "checkedin", "Idle connections in the pool."),
+            ("db_pool_overflow", "overflow", "Current overflow connections."),
+        ):
+            value = self._gauge(method)
+            if value is not None:
+                samples.append((name, "gauge", description, value))
+        return [(name, kind, description, labels, value) for name, kind, description, value in samples]
@@ -0,0 +1,90 @@
+import logging
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import Engine, event
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    """SQL одного запроса (или блока кода): число выражений, время в БД, самое медленное, повторы."""
+
+    count: int = 0
+    total: float = 0.0
+    slowest: float = 0.0
+    slowest_statement: str | None = None
+    statements: Counter[str] = field(default_factory=Counter)
+
+    def observe(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.statements[statement] += 1
+        if seconds > self.slowest:
+            self.slowest, self.slowest_statement = seconds, statement
+
+    def repeated(self, threshold: int | None = None) -> dict[str, int]:
+        """Выражения, выполненные не меньше threshold раз - признак N+1."""
+        threshold = threshold or settings.POSTGRES_REPEATED_QUERY_THRESHOLD
+        return {statement: count for statement, count in self.statements.items() if count >= threshold}
+
+    def server_timing(self) -> str:
+        """Значение заголовка Server-Timing."""
+        return f'db;dur={self.total * 1000:.2f};desc="{self.count} queries", db-slowest;dur={self.slowest * 1000:.2f}'
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Собирает QueryStats по всем выражениям внутри блока (и в порожденных из него задачах)."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def assert_queries(max_count: int, *, allow_repeated: bool = False) -> Iterator[QueryStats]:
+    """Для тестов: блок выполняет не больше max_count выражений и, если не разрешено, без N+1."""
+    with track_queries() as stats:
+        yield stats
+    assert stats.count <= max_count, f"{stats.count} queries, expected at most {max_count}: {list(stats.statements)}"
+    if not allow_repeated:
+        assert not stats.repeated(), f"Repeated queries: {stats.repeated()}"
+
+
+def instrument(engine: Engine) -> None:
+    """Подключает учет выражений к engine (для AsyncEngine - к его sync_engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    seconds = time.perf_counter() - conn.info["query_started_at"].pop()
+    if seconds >= settings.POSTGRES_SLOW_QUERY_SECONDS:
+        logger.warning(f"Slow query {seconds * 1000:.1f} ms: {statement}")
+    stats = _current.get()
+    if stats is not None:
+        stats.observe(statement, seconds)
+
+
+def _handle_error(context) -> None:
+    started_at = context.connection.info.get("query_started_at") if context.connection is not None else None
+    if started_at:
+        started_at.pop()
@@ -0,0 +1,97 @@
+import asyncio
+import itertools
+import logging
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from src.pool import PoolStats
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = "db_primary"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+# 0 на primary и на реплике без отставания (все полученное WAL уже применено)
+LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: AsyncEngine
+    session_factory: async_sessionmaker
+    pool_stats: PoolStats
+    lag: float | None = None  # None - еще не проверялась или недоступна
+    error: str | None = None
+
+
+class ReplicaRouter:
+    """
+    Выбор реплики для обработчиков только на чтение (ReadSessionDep).
+
+    Запрос идет на primary, если реплик нет, метод небезопасный, клиент недавно писал
+    (cookie `db_primary` на `sticky_seconds` после каждого небезопасного запроса, read-your-writes)
+    или все реплики отстают больше `max_lag` секунд. Отставание проверяет фоновая задача `run`.
+    """
+
+    def __init__(self, replicas: list[Replica], max_lag: float, sticky_seconds: int, check_seconds: float):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.sticky_seconds = sticky_seconds
+        self.check_seconds = check_seconds
+        self._next = itertools.count()
+        self.routed_primary = 0
+        self.routed_replica = 0
+        self.lag_fallbacks = 0
+
+    def available(self) -> list[Replica]:
+        return [replica for replica in self.replicas if replica.lag is not None and replica.lag <= self.max_lag]
+
+    def choose(self, request: Request) -> Replica | None:
+        """Реплика для запроса или None - читать с primary."""
+        if not self.replicas or request.method not in SAFE_METHODS or STICKY_COOKIE in request.cookies:
+            self.routed_primary += 1
+            return None
+        available = self.available()
+        if not available:
+            self.lag_fallbacks += 1
+            self.routed_primary += 1
+            return None
+        self.routed_replica += 1
+        return available[next(self._next) % len(available)]
+
+    def stick(self, response: Response) -> None:
+        """Закрепляет клиента за primary, пока реплики не догонят его запись."""
+        if self.replicas and self.sticky_seconds > 0:
+            response.set_cookie(STICKY_COOKIE, "1", max_age=self.sticky_seconds, httponly=True, samesite="lax")
+
+    async def check_lag(self) -> None:
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as conn:
+                    replica.lag = float((await conn.execute(LAG_QUERY)).scalar_one())
+                replica.error = None
+            except Exception as e:
+                replica.lag, replica.error = None, str(e)
+                logger.warning(f"Replica {replica.name} lag check failed: {e}")
+
+    async def run(self) -> None:
+        """Фоновая задача: периодическая проверка отставания реплик."""
+        while True:
+            await asyncio.sleep(self.check_seconds)
+            await self.check_lag()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "replicas": {replica.name: {"lag": replica.lag, "error": replica.error} for replica in self.replicas},
+            "max_lag": self.max_lag,
+            "routed_primary": self.routed_primary,
+            "routed_replica": self.routed_replica,
+            "lag_fallbacks": self.lag_fallbacks,
+        }
@@ -0,0 +1,129 @@
+# Синтетические пользователи для нагрузочных и масштабных тестов, запуск из скрипта (только локальная БД):
+# python -m src.synthetic_data --users 10000000 --seed 42
+import argparse
+import asyncio
+import logging
+import random
+import time
+import uuid
+from collections.abc import Callable
+from typing import Any
+
+from sqlmodel import select
+
+from src.auth.service import get_password_hash
+from src.config import settings
+from src.constants import Environment
+from src.db import async_session_factory, engine
+from src.users.constants import UserRolesEnum
+from src.users.models import User, UserCRUDModel
+from src.users.roles import role_registry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PREFIX = "synthetic_"
+# пароль всех синтетических пользователей, хэш считается один раз на запуск
+SYNTHETIC_PASSWORD = "synthetic_password"  # pragma: allowlist secret
+FIRST_NAMES = ("Anna", "Boris", "Chen", "Daria", "Emil", "Fatima", "Gleb", "Hana", "Ivan", "Julia", "Kofi", "Lena")
+LAST_NAMES = ("Ivanova", "Smith", "Garcia", "Kim", "Novak", "Okafor", "Petrov", "Rossi", "Sato", "Weber")
+
+
+def username(number: int, prefix: str = PREFIX) -> str:
+    return f"{prefix}{number:09d}"
+
+
+def user_row(
+    number: int,
+    seed: int,
+    prefix: str,
+    role_ids: dict[UserRolesEnum, uuid.UUID],
+    hashed_password: str,
+    active_share: float,
+    admin_share: float,
+) -> dict[str, Any]:
+    """Пользователь number: зависит только от seed и number, а не от размера пачки или порядка генерации."""
+    rng = random.Random(seed * 1_000_003 + number)
+    name = username(number, prefix)
+    is_admin = rng.random() < admin_share
+    return {
+        "id": uuid.UUID(int=rng.getrandbits(128), version=4),
+        "username": name,
+        "email": f"{name}@example.com",
+        "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" if rng.random() < 0.8 else None,
+        "is_active": rng.random() < active_share,
+        "is_superuser": False,
+        "hashed_password": hashed_password,
+        "role_id": role_ids[UserRolesEnum.admin if is_admin else UserRolesEnum.user],
+        "authz_version": 0,
+    }
+
+
+async def generate_users(
+    users: int,
+    *,
+    seed: int = 0,
+    prefix: str = PREFIX,
+    chunk_size: int = 50_000,
+    active_share: float = 0.9,
+    admin_share: float = 0.01,
+    progress: Callable[[str], None] = logger.info,
+) -> None:
+    """
+    Создает пользователей 1..users пачками через COPY, каждая пачка - своя транзакция.
+
+    Повторный запуск продолжает с места остановки: пачка, последний пользователь которой уже есть,
+    пропускается. Существующие пользователи с теми же username/email не перезаписываются.
+    """
+    hashed_password = await asyncio.to_thread(get_password_hash, SYNTHETIC_PASSWORD)
+    async with async_session_factory() as session:
+        role_ids = await role_registry.ids_by_name(session)
+    started_at = time.perf_counter()
+    created = 0
+    for start in range(1, users + 1, chunk_size):
+        stop = min(start + chunk_size, users + 1)
+        async with async_session_factory() as session, session.begin():
+            last = username(stop - 1, prefix)
+            if (await session.execute(select(User.id).where(User.username == last))).first() is not None:
+                continue
+            rows = [
+                user_row(number, seed, prefix, role_ids, hashed_password, active_share, admin_share)
+                for number in range(start, stop)
+            ]
+            created += len(await UserCRUDModel.copy_create(session, rows))
+        elapsed = time.perf_counter() - started_at
+        rate = created / elapsed if elapsed else 0
+        eta = (users + 1 - stop) / rate if rate else 0
+        progress(f"{stop - 1}/{users} users, {rate:.0f} rows/s, ETA {eta:.0f} s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate deterministic synthetic users in the local database.")
+    parser.add_argument("--users", type=int, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--prefix", default=PREFIX)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--active-share", type=float, default=0.9)
+    parser.add_argument("--admin-share", type=float, default=0.01)
+    args = parser.parse_args()
+    if settings.ENVIRONMENT not in (Environment.LOCAL, Environment.TESTING):
+        parser.error(f"Refusing to generate data in {settings.ENVIRONMENT.value} environment")
+
+    async def run() -> None:
+        try:
+            await generate_users(
+                args.users,
+                seed=args.seed,
+                prefix=args.prefix,
+                chunk_size=args.chunk_size,
+                active_share=args.active_share,
+                admin_share=args.admin_share,
+            )
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+from typing import Any
+from uuid import UUID
+
+from src.cache import TTLCache
+from src.config import settings
+from src.users.constants import AUTHZ_CLAIM_VERSION, UserRolesEnum
+from src.users.models import User
+from src.users.schemas import AuthzClaim, UserPrincipal
+
+
+def build_authz_claim(user: User | UserPrincipal) -> dict[str, Any]:
+    """Компактный claim `authz` для access-токена."""
+    if isinstance(user, User):
+        role = user.role.name if user.role is not None else None
+    else:
+        role = user.role
+    return {
+        "v": AUTHZ_CLAIM_VERSION,
+        "uid": str(user.id),
+        "role": UserRolesEnum(role).value if role is not None else None,
+        "su": user.is_superuser,
+        "act": user.is_active,
+        "pv": user.authz_version,
+    }
+
+
+def parse_authz_claim(payload: dict[str, Any]) -> AuthzClaim | None:
+    """AuthzClaim из claims токена или None, если claim отсутствует или другой версии."""
+    claim = payload.get("authz")
+    if not isinstance(claim, dict) or claim.get("v") != AUTHZ_CLAIM_VERSION:
+        return None
+    return AuthzClaim(
+        id=claim["uid"],
+        username=payload["sub"],
+        role=claim["role"],
+        is_superuser=claim["su"],
+        is_active=claim["act"],
+        authz_version=claim["pv"],
+    )
+
+
+class AuthzVersions:
+    """
+    Последние известные этому процессу версии прав пользователей (user.authz_version).
+
+    Claim в токене считается устаревшим, если процесс видел более новую версию: после изменения
+    роли/флагов в этом воркере или после загрузки пользователя из БД. Понижение прав, кроме того,
+    отзывает токены пользователя, так что до остальных воркеров оно доходит через denylist.
+    """
+
+    def __init__(self, maxsize: int):
+        self._versions: TTLCache[UUID, int] = TTLCache(maxsize, ttl=float("inf"), name="authz_versions")
+
+    def observe(self, user_id: UUID, version: int) -> None:
+        if version > (self._versions.get(user_id) or 0):
+            self._versions.set(user_id, version)
+
+    def is_stale(self, claim: AuthzClaim) -> bool:
+        known = self._versions.get(claim.id)
+        return known is not None and known > claim.authz_version
+
+    def clear(self) -> None:
+        self._versions.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return self._versions.stats()
+
+
+authz_versions = AuthzVersions(maxsize=settings.AUTHZ_CACHE_MAX_SIZE)
@@ -0,0 +1,60 @@
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cache import TTLCache
+from src.config import settings
+from src.db import on_commit
+from src.users.authz import authz_versions
+from src.users.models import User
+from src.users.schemas import UserPrincipal
+
+
+class PrincipalCache:
+    """
+    Кэш снимков аутентифицированных пользователей по username (claim `sub` токена).
+
+    Попадание в кэш избавляет get_current_principal от SELECT user + role. Записи сбрасываются
+    при изменении/удалении пользователя и смене пароля, в остальных воркерах устаревают по TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache: TTLCache[str, UserPrincipal] = TTLCache(maxsize, ttl, name="principal")
+
+    def get(self, username: str) -> UserPrincipal | None:
+        return self._cache.get(username)
+
+    def put(self, user: User) -> UserPrincipal:
+        principal = UserPrincipal(**user.model_dump(), role=user.role.name if user.role else None)
+        self._cache.set(user.username, principal)
+        authz_versions.observe(user.id, user.authz_version)
+        return principal
+
+    def invalidate(self, *, username: str | None = None, user_id: UUID | None = None) -> None:
+        if username is not None:
+            self._cache.pop(username)
+        if user_id is not None:
+            self._cache.discard_if(lambda _, principal: principal.id == user_id)
+
+    def invalidate_on_commit(
+        self, session: AsyncSession, *, username: str | None = None, user_id: UUID | None = None
+    ) -> None:
+        """
+        Сбрасывает запись сейчас и повторно после commit: до фиксации транзакции конкурентный
+        запрос может успеть закэшировать старый снимок из БД.
+        """
+        self.invalidate(username=username, user_id=user_id)
+        on_commit(session, lambda: self.invalidate(username=username, user_id=user_id))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return self._cache.stats()
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
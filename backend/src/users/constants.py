@@ -6,6 +6,34 @@ class UserRolesEnum(str, Enum):
     user = "user"
 
 
+class UserSortField(str, Enum):
+    """Поля сортировки списка пользователей: NOT NULL и с индексом, как требует keyset-пагинация."""
+
+    username = "username"
+    email = "email"
+    id = "id"
+
+
+class UserImportMode(str, Enum):
+    copy = "copy"  # COPY через временную таблицу, существующие пользователи пропускаются
+    insert = "insert"  # многострочный INSERT, существующие пропускаются
+    upsert = "upsert"  # многострочный INSERT ... ON CONFLICT (username) DO UPDATE
+
+
+# Content-Type тела /users/import -> формат
+USER_IMPORT_FORMATS = {"text/csv": "csv", "application/x-ndjson": "ndjson", "application/jsonl": "ndjson"}
+
+
+class UserExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+USER_EXPORT_MEDIA_TYPES = {UserExportFormat.csv: "text/csv", UserExportFormat.ndjson: "application/x-ndjson"}
+
+# версия формата claim `authz` в access-токене, при изменении формата старые токены идут в БД
+AUTHZ_CLAIM_VERSION = 1
+
 INACTIVE_USER = "Inactive user"
 PASSWORD_UPDATED_SUCCESSFULLY = "Password updated successfully"  # pragma: allowlist secret
 USER_DELETED_SUCCESSFULLY = "User deleted successfully"
@@ -15,3 +43,6 @@ INCORRECT_PASSWORD = "New password cannot be the same as the current one"
 CANNOT_DELETE_SUPERUSER = "Super users are not allowed to delete themselves"
 ROLE_NOT_FOUND = "Role not found"
 NOT_ENOUGH_PRIVILEGES = "The user doesn't have enough privileges"
+UNSUPPORTED_IMPORT_FORMAT = "Unsupported import format, send text/csv or application/x-ndjson"
+DUPLICATE_IMPORT_ROW = "Duplicate username or email in the import"
+INVALID_IMPORT_ROW = "Row is not a JSON object"
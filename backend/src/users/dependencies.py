@@ -1,51 +1,104 @@
-from typing import Annotated
+from typing import Annotated, Any
 
 import jwt
 from fastapi import Depends, HTTPException, status
 
 from src.auth.dependencies import TokenDep
 from src.auth.exceptions import NotValidCredentialsException
-from src.auth.schemas import TokenData
-from src.config import settings
-from src.db import SessionDep
+from src.auth.revocation import token_denylist
+from src.auth.service import decode_access_token
+from src.db import ReadSessionDep, SessionDep
 from src.users import constants
+from src.users.authz import authz_versions, parse_authz_claim
+from src.users.cache import principal_cache
 from src.users.exceptions import NotEnoughPrivilegesException
 from src.users.models import User
-from src.users.schemas import UserPublic
+from src.users.schemas import AuthzClaim, UserPrincipal, UserPublic
 from src.users.service import get_user
 
 
-async def get_current_user(session: SessionDep, token: TokenDep) -> User:
+def get_token_payload(token: TokenDep) -> dict[str, Any]:
     credentials_exception = HTTPException(**NotValidCredentialsException().dict())
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
+        payload = decode_access_token(token)
     except jwt.InvalidTokenError:
         raise credentials_exception
-    user = await get_user(session, username=token_data.username)
-    if user is None:
+    if payload.get("sub") is None:
         raise credentials_exception
+    return payload
+
+
+TokenPayloadDep = Annotated[dict[str, Any], Depends(get_token_payload)]
+
+
+async def get_current_user(session: SessionDep, payload: TokenPayloadDep) -> User:
+    """Пользователь из БД, нужен эндпоинтам, которые изменяют его через сессию."""
+    user = await get_user(session, username=payload["sub"])
+    if user is None or token_denylist.is_revoked(payload, user.id):
+        raise HTTPException(**NotValidCredentialsException().dict())
+    principal_cache.put(user)
     return user
 
 
+async def get_current_principal(session: ReadSessionDep, payload: TokenPayloadDep) -> UserPrincipal:
+    """Снимок пользователя из кэша принципалов, в БД идем только при промахе."""
+    principal = principal_cache.get(payload["sub"])
+    if principal is None:
+        user = await get_user(session, username=payload["sub"])
+        if user is None:
+            raise HTTPException(**NotValidCredentialsException().dict())
+        principal = principal_cache.put(user)
+    if token_denylist.is_revoked(payload, principal.id):
+        raise HTTPException(**NotValidCredentialsException().dict())
+    return principal
+
+
 async def get_current_active_user(
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserPrincipal, Depends(get_current_principal)],
 ) -> UserPublic:
     if not current_user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=constants.INACTIVE_USER)
-    return UserPublic(**current_user.model_dump())
+    return current_user
 
 
 CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentPrincipal = Annotated[UserPrincipal, Depends(get_current_principal)]
 
 
-def get_current_active_superuser(current_user: CurrentUser) -> User:
+def get_current_active_superuser(current_user: CurrentPrincipal) -> UserPrincipal:
     if not current_user.is_superuser:
         raise HTTPException(**NotEnoughPrivilegesException().dict())
     return current_user
 
 
-CurrentSuperuser = Annotated[User, Depends(get_current_active_superuser)]
+CurrentSuperuser = Annotated[UserPrincipal, Depends(get_current_active_superuser)]
+
+
+async def get_token_authz(session: ReadSessionDep, payload: TokenPayloadDep) -> AuthzClaim:
+    """
+    Права пользователя из claim `authz` токена, без обращения к БД.
+
+    Если claim отсутствует, другой версии формата или процесс уже видел более новую версию
+    прав пользователя, права берутся из снимка пользователя (кэш принципалов, затем БД).
+    """
+    claim = parse_authz_claim(payload)
+    if claim is None or authz_versions.is_stale(claim):
+        principal = await get_current_principal(session, payload)
+        return AuthzClaim(**principal.model_dump())
+    if token_denylist.is_revoked(payload, claim.id):
+        raise HTTPException(**NotValidCredentialsException().dict())
+    return claim
+
+
+TokenAuthz = Annotated[AuthzClaim, Depends(get_token_authz)]
+
+
+def get_token_active_superuser(authz: TokenAuthz) -> AuthzClaim:
+    if not authz.is_active:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=constants.INACTIVE_USER)
+    if not authz.is_superuser:
+        raise HTTPException(**NotEnoughPrivilegesException().dict())
+    return authz
+
+
+TokenSuperuser = Annotated[AuthzClaim, Depends(get_token_active_superuser)]
@@ -53,3 +53,11 @@ class RoleNotFoundException(HTTPResponseException):
 class NotEnoughPrivilegesException(HTTPResponseException):
     def __init__(self):
         super().__init__(detail=constants.NOT_ENOUGH_PRIVILEGES, status_code=status.HTTP_403_FORBIDDEN)
+
+
+class UnsupportedImportFormatException(HTTPResponseException):
+    def __init__(self):
+        super().__init__(
+            detail=constants.UNSUPPORTED_IMPORT_FORMAT,
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        )
@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Sequence
+from typing import Any
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.sql import Select
+from sqlmodel import select
+
+from src.users.constants import UserExportFormat, UserRolesEnum
+from src.users.models import User
+from src.users.roles import role_registry
+
+# колонки выгрузки: поля UserPublic и имя роли
+EXPORT_COLUMNS = (User.id, User.username, User.email, User.full_name, User.is_active, User.is_superuser, User.role_id)
+EXPORT_FIELDS = ("id", "username", "email", "full_name", "is_active", "is_superuser", "role")
+
+
+def export_query(is_active: bool | None = None, role_id: Any = None) -> Select:
+    query = select(*EXPORT_COLUMNS).order_by(User.id)
+    if is_active is not None:
+        query = query.where(User.is_active == is_active)
+    if role_id is not None:
+        query = query.where(User.role_id == role_id)
+    return query
+
+
+def encode_rows(rows: Sequence[Sequence[Any]], data_format: UserExportFormat, header: bool = False) -> bytes:
+    """Пачка строк (значения в порядке EXPORT_FIELDS) в CSV или NDJSON."""
+    if data_format is UserExportFormat.ndjson:
+        return "".join(
+            json.dumps(dict(zip(EXPORT_FIELDS, row, strict=True)), default=str) + "\n" for row in rows
+        ).encode()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def export_users(
+    session_factory: async_sessionmaker,
+    data_format: UserExportFormat,
+    fetch_size: int,
+    is_active: bool | None = None,
+    role: UserRolesEnum | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    Выгрузка пользователей потоком из серверного курсора: в памяти не больше `fetch_size` строк.
+
+    Сессия своя - генератор работает после выхода из зависимостей запроса, пока StreamingResponse
+    отдает тело; следующая пачка читается, только когда клиент принял предыдущую.
+    """
+    async with session_factory() as session, session.begin():
+        role_ids = await role_registry.ids_by_name(session)
+        role_names = {role_id: name.value for name, role_id in role_ids.items()}
+        header = True
+        if role is not None and role not in role_ids:  # такой роли нет - нет и пользователей
+            yield encode_rows([], data_format, header)
+            return
+        query = export_query(is_active, role_ids[role] if role is not None else None)
+        result = await session.stream(query.execution_options(yield_per=fetch_size))
+        async for rows in result.partitions():
+            yield encode_rows([(*row[:-1], role_names.get(row[-1])) for row in rows], data_format, header)
+            header = False
+        if header:
+            yield encode_rows([], data_format, header)
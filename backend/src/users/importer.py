@@ -0,0 +1,229 @@
+import csv
+import json
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth.hashing import import_password_hasher
+from src.auth.revocation import token_denylist
+from src.auth.service import get_password_hash
+from src.config import settings
+from src.db import async_session_factory
+from src.users import constants
+from src.users.cache import principal_cache
+from src.users.constants import UserImportMode, UserRolesEnum
+from src.users.models import User, UserCRUDModel
+from src.users.roles import role_registry
+from src.users.schemas import UserImportError, UserImportReport, UserImportRow
+
+FOREIGN_KEY_VIOLATION = "23503"
+# поля, которые upsert переписывает у существующего пользователя (ключ - username): email и пароль в строке
+# обязательны, остальные - только если заданы в строке, иначе у пользователя остаются прежние значения
+UPSERT_FIELDS = ("email", "hashed_password")
+UPSERT_OPTIONAL_FIELDS = ("full_name", "is_active", "is_superuser", "role_id")
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Строки потока байт без загрузки всего тела в память."""
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if buffer:
+        yield buffer.rstrip(b"\r")
+
+
+async def parse_rows(stream: AsyncIterator[bytes], data_format: str) -> AsyncIterator[tuple[int, dict[str, Any] | str]]:
+    """
+    Строки CSV (первая - заголовок) или NDJSON по одной: (номер строки, поля) или (номер, ошибка разбора).
+
+    В CSV пустая ячейка означает незаданное поле. Переводы строк внутри ячеек CSV не поддерживаются.
+    """
+    header = None
+    number = 0
+    async for line in iter_lines(stream):
+        number += 1
+        try:
+            text = line.decode("utf-8-sig" if number == 1 else "utf-8")
+            if not text.strip():
+                continue
+            if data_format == "csv":
+                values = next(csv.reader([text]))
+                if header is None:
+                    header = [name.strip() for name in values]
+                    continue
+                if len(values) != len(header):
+                    raise ValueError(f"Expected {len(header)} columns, got {len(values)}")
+                yield number, {name: value for name, value in zip(header, values, strict=True) if value != ""}
+            else:
+                data = json.loads(text)
+                if not isinstance(data, dict):
+                    raise ValueError(constants.INVALID_IMPORT_ROW)
+                yield number, data
+        except (ValueError, csv.Error) as e:
+            yield number, str(e)
+
+
+def upsert_fields(row: UserImportRow) -> tuple[str, ...]:
+    """Колонки, которые upsert переписывает по этой строке; роль задается именем (role) или role_id."""
+    given = row.model_fields_set | ({"role_id"} if "role" in row.model_fields_set else set())
+    return UPSERT_FIELDS + tuple(name for name in UPSERT_OPTIONAL_FIELDS if name in given)
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, item['loc']))}: {item['msg']}" for item in error.errors())
+
+
+class UserImporter:
+    """
+    Импорт пользователей пачками по `chunk_size` строк.
+
+    Пароли пачки хэшируются параллельно в отдельном пуле (import_password_hasher), пачка пишется
+    одним COPY или многострочным INSERT в своей транзакции. Если пачка целиком падает на ограничении
+    (upsert с конфликтом по email, несуществующий role_id), она повторяется построчно в SAVEPOINT,
+    чтобы найти виноватые строки. Ошибки копятся в отчете не больше `max_errors` штук.
+    """
+
+    def __init__(
+        self,
+        mode: UserImportMode,
+        chunk_size: int = settings.USER_IMPORT_CHUNK_SIZE,
+        max_errors: int = settings.USER_IMPORT_MAX_REPORTED_ERRORS,
+    ):
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.report = UserImportReport()
+        self._roles: dict[UserRolesEnum, Any] = {}
+
+    def _error(self, row: int, error: str, username: str | None = None) -> None:
+        self.report.failed += 1
+        if len(self.report.errors) < self.max_errors:
+            self.report.errors.append(UserImportError(row=row, username=username, error=error))
+        else:
+            self.report.errors_truncated = True
+
+    async def run(self, rows: AsyncIterator[tuple[int, dict[str, Any] | str]]) -> UserImportReport:
+        async with async_session_factory() as session:
+            self._roles = await role_registry.ids_by_name(session)
+        chunk: list[tuple[int, UserImportRow]] = []
+        async for number, data in rows:
+            if isinstance(data, str):
+                self._error(number, data)
+                continue
+            try:
+                chunk.append((number, UserImportRow.model_validate(data)))
+            except ValidationError as e:
+                self._error(number, _validation_message(e), data.get("username"))
+                continue
+            if len(chunk) >= self.chunk_size:
+                await self._import_chunk(chunk)
+                chunk = []
+        if chunk:
+            await self._import_chunk(chunk)
+        return self.report
+
+    def _prepare(self, chunk: list[tuple[int, UserImportRow]]) -> list[tuple[int, UserImportRow, tuple[str, ...]]]:
+        """
+        Отбрасывает повторы внутри пачки и строки с неизвестной ролью; к строке добавляются поля для upsert,
+        до подстановки роли по умолчанию.
+        """
+        usernames, emails, prepared = set(), set(), []
+        for number, row in chunk:
+            if row.username in usernames or row.email in emails:
+                self._error(number, constants.DUPLICATE_IMPORT_ROW, row.username)
+                continue
+            usernames.add(row.username)
+            emails.add(row.email)
+            fields = upsert_fields(row)
+            if row.role_id is None:
+                row.role_id = self._roles.get(row.role or UserRolesEnum.user)
+                if row.role_id is None:
+                    self._error(number, constants.ROLE_NOT_FOUND, row.username)
+                    continue
+            prepared.append((number, row, fields))
+        return prepared
+
+    async def _import_chunk(self, chunk: list[tuple[int, UserImportRow]]) -> None:
+        prepared = self._prepare(chunk)
+        if not prepared:
+            return
+        hashes = await import_password_hasher.map(get_password_hash, [row.password for _, row, _ in prepared])
+        users = [
+            (
+                number,
+                # role - имя роли из файла, у User это связь
+                User.model_validate(row.model_dump(exclude={"role"}), update={"hashed_password": hashed}).model_dump(),
+                fields,
+            )
+            for (number, row, fields), hashed in zip(prepared, hashes, strict=True)
+        ]
+        failures: dict[int, str] = {}
+        async with async_session_factory() as session, session.begin():
+            try:
+                async with session.begin_nested():
+                    written = await self._write(session, [(values, fields) for _, values, fields in users], self.mode)
+            except IntegrityError:
+                written = []
+                for number, values, fields in users:
+                    try:
+                        async with session.begin_nested():
+                            mode = UserImportMode.insert if self.mode is UserImportMode.copy else self.mode
+                            written += await self._write(session, [(values, fields)], mode)
+                    except IntegrityError as e:
+                        foreign_key = getattr(e.orig, "sqlstate", None) == FOREIGN_KEY_VIOLATION
+                        failures[number] = constants.ROLE_NOT_FOUND if foreign_key else constants.USER_ALREADY_EXISTS
+            await self._account(session, users, written, failures)
+
+    async def _write(
+        self, session: AsyncSession, rows: list[tuple[dict[str, Any], tuple[str, ...]]], mode: UserImportMode
+    ) -> list[Row]:
+        """Строки - значения и поля для upsert; upsert пишется отдельным запросом на каждый набор полей."""
+        returning = (User.id, User.username)
+        if mode is UserImportMode.copy:
+            return await UserCRUDModel.copy_create(session, [values for values, _ in rows], returning=returning)
+        if mode is UserImportMode.insert:
+            return await UserCRUDModel.bulk_create(session, [values for values, _ in rows], returning=returning)
+        groups: dict[tuple[str, ...], list[dict[str, Any]]] = defaultdict(list)
+        for values, fields in rows:
+            groups[fields].append(values)
+        written = []
+        for fields, group in groups.items():
+            written += await UserCRUDModel.bulk_upsert(
+                session,
+                group,
+                index_elements=["username"],
+                update_fields=list(fields),
+                update_values={"authz_version": User.authz_version + 1},
+                returning=returning,
+            )
+        return written
+
+    async def _account(
+        self,
+        session: AsyncSession,
+        users: list[tuple[int, dict[str, Any], tuple[str, ...]]],
+        written: list[Row],
+        failures: dict[int, str],
+    ) -> None:
+        written_by_username = {row.username: row for row in written}
+        updated_ids = []
+        for number, values, _ in users:
+            row = written_by_username.get(values["username"])
+            if row is None:
+                self._error(number, failures.get(number, constants.USER_ALREADY_EXISTS), values["username"])
+            elif getattr(row, "inserted", True):
+                self.report.created += 1
+            else:
+                self.report.updated += 1
+                updated_ids.append(row.id)
+                principal_cache.invalidate_on_commit(session, username=row.username)
+        # у обновленных могли смениться пароль и права - как при смене пароля, старые токены отзываются
+        await token_denylist.revoke_users(session, updated_ids)
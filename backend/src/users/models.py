@@ -1,5 +1,6 @@
 import uuid
 
+from sqlalchemy import Index, text
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlmodel import Field, Relationship, SQLModel
 
@@ -9,10 +10,20 @@ from src.users.schemas import UserBase
 
 
 class User(UserBase, AsyncAttrs, table=True):
+    __table_args__ = (
+        # страницы списка активных пользователей по ключу пагинации по умолчанию (username, id)
+        Index("ix_user_active_username_id", "username", "id", postgresql_where=text("is_active")),
+        # поиск по email без учета регистра, см. UserCRUD.get_by_email
+        Index("ix_user_email_lower", text("lower(email)")),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     hashed_password: str
-    role_id: uuid.UUID = Field(foreign_key="role.id", nullable=False, ondelete="RESTRICT")
-    role: "Role" = Relationship(back_populates="users", sa_relationship_kwargs={"lazy": "selectin"})
+    role_id: uuid.UUID = Field(foreign_key="role.id", nullable=False, ondelete="RESTRICT", index=True)
+    # растет при изменении роли или флагов, сверяется с claim `authz` в токене
+    authz_version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    # связи не загружаются неявно: нужный граф запрашивается опциями загрузки в месте вызова
+    role: "Role" = Relationship(back_populates="users", sa_relationship_kwargs={"lazy": "raise"})
 
 
 class UserCRUDModel(CRUDBase):
@@ -22,7 +33,7 @@ class UserCRUDModel(CRUDBase):
 class Role(SQLModel, AsyncAttrs, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     name: UserRolesEnum = Field(default=UserRolesEnum.user, unique=True)
-    users: list[User] | None = Relationship(back_populates="role", sa_relationship_kwargs={"lazy": "selectin"})
+    users: list[User] | None = Relationship(back_populates="role", sa_relationship_kwargs={"lazy": "raise"})
 
 
 class RoleCRUDModel(CRUDBase):
@@ -0,0 +1,68 @@
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.db import on_commit
+from src.users.constants import UserRolesEnum
+from src.users.models import Role
+
+
+class RoleRegistry:
+    """
+    Роли в памяти процесса вместо запроса к таблице role при каждом создании и изменении пользователя.
+
+    В таблице пара строк (UserRolesEnum), она заполняется в lifespan. Изменения через RoleCRUD применяются
+    к реестру после коммита, промах перечитывает таблицу - роль могли создать в другом воркере.
+    """
+
+    def __init__(self):
+        self._ids: dict[UserRolesEnum, UUID] = {}
+        self._names: dict[UUID, UserRolesEnum] = {}
+        self.loaded = False
+
+    async def load(self, session: AsyncSession) -> None:
+        rows = (await session.execute(select(Role.id, Role.name))).all()
+        self._ids = {UserRolesEnum(name): role_id for role_id, name in rows}
+        self._names = {role_id: name for name, role_id in self._ids.items()}
+        self.loaded = True
+
+    async def get_id(self, session: AsyncSession, name: UserRolesEnum | str) -> UUID | None:
+        name = UserRolesEnum(name)
+        if name not in self._ids:
+            await self.load(session)
+        return self._ids.get(name)
+
+    async def get_name(self, session: AsyncSession, role_id: UUID) -> UserRolesEnum | None:
+        if role_id not in self._names:
+            await self.load(session)
+        return self._names.get(role_id)
+
+    async def ids_by_name(self, session: AsyncSession) -> dict[UserRolesEnum, UUID]:
+        if not self.loaded:
+            await self.load(session)
+        return dict(self._ids)
+
+    def clear(self) -> None:
+        """Забыть все роли: следующее обращение перечитает таблицу."""
+        self._ids, self._names = {}, {}
+        self.loaded = False
+
+    def add(self, role_id: UUID, name: UserRolesEnum | str) -> None:
+        self.discard(self._ids.get(UserRolesEnum(name)))
+        self._ids[UserRolesEnum(name)] = role_id
+        self._names[role_id] = UserRolesEnum(name)
+
+    def discard(self, role_id: UUID | None) -> None:
+        name = self._names.pop(role_id, None)
+        if name is not None:
+            self._ids.pop(name, None)
+
+    def add_on_commit(self, session: AsyncSession, role_id: UUID, name: UserRolesEnum | str) -> None:
+        on_commit(session, lambda: self.add(role_id, name))
+
+    def discard_on_commit(self, session: AsyncSession, role_id: UUID) -> None:
+        on_commit(session, lambda: self.discard(role_id))
+
+
+role_registry = RoleRegistry()
@@ -2,28 +2,43 @@ import logging
 from typing import Annotated, Any
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 
 from src.auth.exceptions import UserNotFoundException
-from src.auth.service import generate_new_account_email, get_password_hash, verify_password
+from src.auth.revocation import token_denylist
+from src.auth.service import generate_new_account_email, get_password_hash_async, verify_password_async
 from src.config import settings
-from src.constants import EMAILS_DISABLED
-from src.db import SessionDep
-from src.exceptions import EmailsDisabledException
+from src.constants import EMAILS_DISABLED, SortOrder, TotalMode
+from src.db import ReadSessionDep, SessionDep, async_session_factory, replica_router
+from src.exceptions import EmailsDisabledException, InvalidCursor, InvalidCursorException
 from src.models import Message
 from src.users import constants, exceptions
-from src.users.dependencies import CurrentSuperuser, CurrentUser, get_current_active_superuser, get_current_active_user
+from src.users.cache import principal_cache
+from src.users.constants import (
+    USER_EXPORT_MEDIA_TYPES,
+    USER_IMPORT_FORMATS,
+    UserExportFormat,
+    UserImportMode,
+    UserRolesEnum,
+    UserSortField,
+)
+from src.users.dependencies import CurrentUser, TokenSuperuser, get_current_active_user, get_token_active_superuser
 from src.users.exceptions import (
     IncorrectPasswordException,
     InvalidPasswordException,
     RoleNotFound,
     RoleNotFoundException,
+    UnsupportedImportFormatException,
     UserAlreadyExists,
     UserAlreadyExistsException,
 )
+from src.users.exporter import export_users
+from src.users.importer import UserImporter, parse_rows
 from src.users.schemas import (
     UpdatePassword,
     UserCreate,
+    UserImportReport,
     UserPublic,
     UserRegister,
     UsersPublic,
@@ -66,16 +81,59 @@ async def test_read_user_by_id(user_id: UUID) -> Any:
 @router.get(
     "/",
     response_model=UsersPublic,
-    dependencies=[Depends(get_current_active_superuser)],  # можно так, а можно через параметры
+    dependencies=[Depends(get_token_active_superuser)],  # можно так, а можно через параметры
 )
 async def get_users(
-    session: SessionDep,
-    skip: int = 0,
-    limit: int = 100,  # current_superuser: CurrentSuperuser вот так
+    session: ReadSessionDep,
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,  # current_superuser: TokenSuperuser вот так
+    sort: UserSortField = UserSortField.username,
+    order: SortOrder = SortOrder.asc,
+    total: TotalMode = TotalMode.exact,
 ) -> UsersPublic:
-    """All users, only for superusers."""
-    users = await UserCRUD.get_all(session, skip=skip, limit=limit)
-    return UsersPublic(data=[UserPublic(**user.model_dump()) for user in users], count=len(users))
+    """
+    All users, only for superusers.
+
+    Pass `next_cursor` from the previous page as `cursor` to get the next one. `count` is the total
+    number of users: exact, from the same query (`window`) or a planner estimate (`estimated`).
+    """
+    try:
+        page = await UserCRUD.get_page(session, sort=sort, order=order, limit=limit, cursor=cursor, total=total)
+    except InvalidCursor:
+        raise HTTPException(**InvalidCursorException().dict())
+    return UsersPublic(
+        data=[UserPublic(**user.model_dump()) for user in page.items],
+        count=page.total,
+        next_cursor=page.next_cursor,
+    )
+
+
+@router.get(
+    "/export",
+    dependencies=[Depends(get_token_active_superuser)],
+    response_class=StreamingResponse,
+    responses={200: {"content": {media_type: {} for media_type in USER_EXPORT_MEDIA_TYPES.values()}}},
+)
+async def export_users_dump(
+    request: Request,
+    data_format: Annotated[UserExportFormat, Query(alias="format")] = UserExportFormat.ndjson,
+    fetch_size: Annotated[int, Query(ge=1, le=50_000)] = settings.USER_EXPORT_FETCH_SIZE,
+    is_active: bool | None = None,
+    role: UserRolesEnum | None = None,
+) -> StreamingResponse:
+    """
+    Stream all users as NDJSON or CSV (header line first), only for superusers.
+
+    Rows are read from a server-side cursor `fetch_size` at a time, so memory does not grow with
+    the number of users. Optional filters: `is_active` and `role`.
+    """
+    replica = replica_router.choose(request)
+    session_factory = replica.session_factory if replica is not None else async_session_factory
+    return StreamingResponse(
+        export_users(session_factory, data_format, fetch_size, is_active, role),
+        media_type=USER_EXPORT_MEDIA_TYPES[data_format],
+        headers={"Content-Disposition": f'attachment; filename="users.{data_format.value}"'},
+    )
 
 
 @router.get("/me/", response_model=UserPublic)
@@ -83,8 +141,8 @@ async def read_user_me(current_user: Annotated[UserPublic, Depends(get_current_a
     return current_user
 
 
-@router.get("/{user_id}", response_model=UserPublic, dependencies=[Depends(get_current_active_superuser)])
-async def read_user_by_id(user_id: UUID, session: SessionDep) -> Any:
+@router.get("/{user_id}", response_model=UserPublic, dependencies=[Depends(get_token_active_superuser)])
+async def read_user_by_id(user_id: UUID, session: ReadSessionDep) -> Any:
     """
     Get a specific user by id.
     """
@@ -94,7 +152,7 @@ async def read_user_by_id(user_id: UUID, session: SessionDep) -> Any:
     return user
 
 
-@router.post("/", dependencies=[Depends(get_current_active_superuser)], response_model=UserPublic)
+@router.post("/", dependencies=[Depends(get_token_active_superuser)], response_model=UserPublic)
 async def create_user(user: UserCreate, session: SessionDep) -> Any:
     """
     Create new user only for superusers.
@@ -114,11 +172,42 @@ async def create_user(user: UserCreate, session: SessionDep) -> Any:
         logger.warning(
             f"User {user.username} created without email. Emails are disabled in settings or user has no email."
         )
+        await session.commit()  # пользователь создан, ошибка относится только к письму
         raise HTTPException(**EmailsDisabledException(detail=EMAILS_DISABLED).dict())
 
     return db_user
 
 
+@router.post(
+    "/import",
+    dependencies=[Depends(get_token_active_superuser)],
+    response_model=UserImportReport,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {content_type: {"schema": {"type": "string"}} for content_type in USER_IMPORT_FORMATS},
+        }
+    },
+)
+async def import_users(
+    request: Request,
+    mode: UserImportMode = UserImportMode.copy,
+    chunk_size: Annotated[int, Query(ge=1, le=10_000)] = settings.USER_IMPORT_CHUNK_SIZE,
+) -> Any:
+    """
+    Bulk import of users from CSV (header line first) or NDJSON, only for superusers.
+
+    The body is streamed and written in chunks, each chunk in its own transaction. Rows take the
+    UserCreate fields plus an optional role name. copy and insert skip existing users, upsert updates
+    them by username: email and password always, the other fields only when present in the row
+    (an empty CSV cell counts as absent), so omitted columns keep their current values. Returns per-row errors, successful chunks are not rolled back.
+    """
+    data_format = USER_IMPORT_FORMATS.get(request.headers.get("content-type", "").split(";")[0].strip())
+    if data_format is None:
+        raise HTTPException(**UnsupportedImportFormatException().dict())
+    return await UserImporter(mode, chunk_size).run(parse_rows(request.stream(), data_format))
+
+
 @router.post("/signup", response_model=UserPublic)
 async def register_user(session: SessionDep, user_in: UserRegister) -> Any:
     """
@@ -131,7 +220,7 @@ async def register_user(session: SessionDep, user_in: UserRegister) -> Any:
     return user
 
 
-@router.patch("/{user_id}", dependencies=[Depends(get_current_active_superuser)], response_model=UserPublic)
+@router.patch("/{user_id}", dependencies=[Depends(get_token_active_superuser)], response_model=UserPublic)
 async def update_user(session: SessionDep, user_id: UUID, user_in: UserUpdate) -> Any:
     """
     Update a user, only for superusers.
@@ -164,15 +253,16 @@ async def update_password_me(session: SessionDep, body: UpdatePassword, current_
     """
     Update own password.
     """
-    if not verify_password(body.current_password, current_user.hashed_password):
+    if not await verify_password_async(body.current_password, current_user.hashed_password):
         raise HTTPException(**InvalidPasswordException().dict())
     if body.current_password == body.new_password:
         raise HTTPException(**IncorrectPasswordException().dict())
 
-    hashed_password = get_password_hash(password=body.new_password)
+    hashed_password = await get_password_hash_async(password=body.new_password)
     current_user.hashed_password = hashed_password
     session.add(current_user)
-    await session.commit()
+    principal_cache.invalidate_on_commit(session, username=current_user.username)
+    await token_denylist.revoke_user(session, current_user.id)
     return Message(message=constants.PASSWORD_UPDATED_SUCCESSFULLY)
 
 
@@ -181,11 +271,12 @@ async def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
     if current_user.is_superuser:
         raise HTTPException(**exceptions.SuperuserDeleteException().dict())
     await UserCRUD.delete(session, current_user.id)
+    await token_denylist.revoke_user(session, current_user.id)
     return Message(constants.USER_DELETED_SUCCESSFULLY)
 
 
 @router.delete("/{user_id}", response_model=Message)
-async def delete_user(session: SessionDep, user_id: UUID, current_superuser: CurrentSuperuser) -> Any:
+async def delete_user(session: SessionDep, user_id: UUID, current_superuser: TokenSuperuser) -> Any:
     """Delete a user, only for superusers."""
     user = await UserCRUD.get(session, "id", user_id)
     if not user:
@@ -193,4 +284,5 @@ async def delete_user(session: SessionDep, user_id: UUID, current_superuser: Cur
     if current_superuser.id == user_id:
         raise HTTPException(**exceptions.SuperuserDeleteException().dict())
     await UserCRUD.delete(session, user_id)
+    await token_denylist.revoke_user(session, user_id)
     return Message(message=constants.USER_DELETED_SUCCESSFULLY)
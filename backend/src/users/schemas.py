@@ -3,6 +3,8 @@ import uuid
 from pydantic import EmailStr
 from sqlmodel import Field, SQLModel
 
+from src.users.constants import UserRolesEnum
+
 
 class UserBase(SQLModel):
     username: str = Field(unique=True, index=True, max_length=255)
@@ -49,9 +51,46 @@ class UserPublic(UserBase):
     id: uuid.UUID
 
 
+# Компактный снимок аутентифицированного пользователя, хранится в кэше принципалов
+class UserPrincipal(UserPublic):
+    role_id: uuid.UUID
+    role: UserRolesEnum | None = None
+    authz_version: int = 0
+
+
+# Права пользователя из claim `authz` access-токена
+class AuthzClaim(SQLModel):
+    id: uuid.UUID
+    username: str
+    role: UserRolesEnum | None = None
+    is_superuser: bool
+    is_active: bool
+    authz_version: int
+
+
+# Строка файла импорта: роль можно указать именем
+class UserImportRow(UserCreate):
+    role: UserRolesEnum | None = None
+
+
+class UserImportError(SQLModel):
+    row: int  # номер строки в файле, с 1
+    username: str | None = None
+    error: str
+
+
+class UserImportReport(SQLModel):
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: list[UserImportError] = []
+    errors_truncated: bool = False  # ошибок больше, чем USER_IMPORT_MAX_REPORTED_ERRORS
+
+
 class UsersPublic(SQLModel):
     data: list[UserPublic]
-    count: int
+    count: int  # всего пользователей по фильтру, не размер страницы
+    next_cursor: str | None = None
 
 
 class UpdatePassword(SQLModel):
@@ -1,16 +1,27 @@
 import logging
+from collections.abc import Sequence
 from typing import Any
+from uuid import UUID
 
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.sql.base import ExecutableOption
+from sqlmodel import func, select
 
-from src.auth.service import get_password_hash
+from src.auth.revocation import token_denylist
+from src.auth.service import get_password_hash_async
 from src.config import settings
-from src.db import SessionDep
-from src.models import get_list
-from src.users.constants import UserRolesEnum
+from src.constants import SortOrder, TotalMode
+from src.db import SessionDep, on_commit
+from src.models import Page, exactly_one, get_list, paginate
+from src.users.authz import authz_versions
+from src.users.cache import principal_cache
+from src.users.constants import UserRolesEnum, UserSortField
 from src.users.exceptions import RoleNotFound, UserAlreadyExists
 from src.users.models import Role, RoleCRUDModel, User, UserCRUDModel
+from src.users.roles import role_registry
 from src.users.schemas import RoleBase, RoleCreate, UserCreate, UserRegister, UserUpdate, UserUpdateMe
 
 logger = logging.getLogger(__name__)
@@ -26,23 +37,28 @@ class UserCRUD:
 
     @classmethod
     async def create(cls, session: AsyncSession, user_create: UserCreate | UserRegister) -> User:
-        if await cls.crud.get(session, "email", user_create.email):
-            raise UserAlreadyExists(
-                f"User with email {user_create.email} already exists"  # TODO: залогировать все подобные?
+        """
+        Один INSERT ... ON CONFLICT DO NOTHING RETURNING: занятые email и username определяют уникальные
+        индексы (пустой RETURNING), роль проверяется по реестру ролей без запроса, роль, удаленную
+        в другом воркере, отсекает внешний ключ.
+        """
+        role_id = getattr(user_create, "role_id", None)
+        if role_id is None:
+            role_id = await role_registry.get_id(session, UserRolesEnum.user)
+        elif await role_registry.get_name(session, role_id) is None:
+            role_id = None
+        if role_id is None:
+            raise RoleNotFound(f"Role {getattr(user_create, 'role_id', None) or UserRolesEnum.user.name} not found")
+        hashed_password = await get_password_hash_async(user_create.password)
+        values = user_create.model_dump(exclude={"password"}) | {"hashed_password": hashed_password, "role_id": role_id}
+        try:
+            db_obj = await session.scalar(insert(User).values(**values).on_conflict_do_nothing().returning(User))
+        except IntegrityError as e:
+            raise RoleNotFound(f"Role {role_id} not found") from e
+        if db_obj is None:
+            raise UserAlreadyExists(  # TODO: залогировать все подобные?
+                f"User with email {user_create.email} or username {user_create.username} already exists"
             )
-        if await cls.crud.get(session, "username", user_create.username):
-            raise UserAlreadyExists(f"User with username {user_create.username} already exists")
-        if getattr(user_create, "role_id", None) is None:
-            user_create = UserCreate.model_validate(user_create, update={"role_id": None})
-        if user_create.role_id is not None:
-            if await RoleCRUD.get(session, "id", user_create.role_id) is None:
-                raise RoleNotFound(f"Role with id {user_create.role_id} not found")
-        if user_create.role_id is None:
-            user_create.role_id = (await RoleCRUD.get(session, "name", UserRolesEnum.user.name)).id
-        db_obj = User.model_validate(user_create, update={"hashed_password": get_password_hash(user_create.password)})
-        session.add(db_obj)
-        await session.commit()
-        await session.refresh(db_obj)
         return db_obj
 
     @classmethod
@@ -51,11 +67,10 @@ class UserCRUD:
         extra_data = {}
         if "password" in user_data:  # хэшируем пароль
             password = user_data["password"]
-            hashed_password = get_password_hash(password)
+            hashed_password = await get_password_hash_async(password)
             extra_data["hashed_password"] = hashed_password
         if "role_id" in user_data and user_data["role_id"] != db_user.role_id:
-            role = await RoleCRUD.get(session, "id", user_data["role_id"])
-            if role is None:
+            if await role_registry.get_name(session, user_data["role_id"]) is None:
                 raise RoleNotFound(f"Role with id {user_data['role_id']} not found")
             extra_data["role_id"] = user_data["role_id"]
         if "email" in user_data and user_data["email"] != db_user.email:
@@ -66,54 +81,93 @@ class UserCRUD:
             if await cls.crud.get(session, "username", user_data["username"]):
                 raise UserAlreadyExists(f"User with username {user_data['username']} already exists")
             extra_data["username"] = user_data["username"]
+        principal_cache.invalidate_on_commit(session, username=db_user.username)
+        was_superuser, was_active, old_role_id = db_user.is_superuser, db_user.is_active, db_user.role_id
         db_user.sqlmodel_update(user_data, update=extra_data)
+        authz_changed = (was_superuser, was_active, old_role_id) != (
+            db_user.is_superuser,
+            db_user.is_active,
+            db_user.role_id,
+        )
+        if authz_changed:
+            db_user.authz_version = User.authz_version + 1  # инкремент на стороне БД
         session.add(db_user)
-        await session.commit()
-        await session.refresh(db_user)
+        await session.flush()
+        principal_cache.invalidate_on_commit(session, username=db_user.username)
+        if authz_changed:
+            await session.refresh(db_user, ["authz_version"])
+            on_commit(session, lambda: authz_versions.observe(db_user.id, db_user.authz_version))
+            # понижение прав и смена роли отзывают токены, иначе устаревший claim
+            # продолжал бы действовать в воркерах, которые не видели новую версию
+            demoted = (was_superuser and not db_user.is_superuser) or (was_active and not db_user.is_active)
+            if demoted or old_role_id != db_user.role_id:
+                await token_denylist.revoke_user(session, db_user.id)
         return db_user
 
     @classmethod
-    async def get(cls, session: AsyncSession, field: str, value: Any) -> User:
-        return await cls.crud.get(session, field, value)
+    async def get(cls, session: AsyncSession, field: str, value: Any, options: Sequence[ExecutableOption] = ()) -> User:
+        return await cls.crud.get(session, field, value, options)
 
     @classmethod
-    async def get_by_username(cls, session: AsyncSession, username: str) -> User:
-        return await cls.crud.get(session, "username", username)  # уникальное поле
+    async def get_by_username(
+        cls, session: AsyncSession, username: str, options: Sequence[ExecutableOption] = ()
+    ) -> User:
+        return await cls.crud.get(session, "username", username, options)  # уникальное поле
 
     @classmethod
-    async def get_all(cls, session: AsyncSession, skip: int = 0, limit: int = 100) -> list[User]:
-        return await get_list(session, select(User).where(User.is_active).offset(skip).limit(limit))
+    async def get_page(
+        cls,
+        session: AsyncSession,
+        *,
+        sort: UserSortField = UserSortField.username,
+        order: SortOrder = SortOrder.asc,
+        limit: int = 100,
+        cursor: str | None = None,
+        total: TotalMode = TotalMode.exact,
+    ) -> Page[User]:
+        query = select(User).where(User.is_active)
+        return await paginate(session, query, sort=sort.value, order=order, limit=limit, cursor=cursor, total=total)
 
     @classmethod
     async def get_by_email(cls, session: AsyncSession, email: str) -> User:
-        return await cls.crud.get(session, "email", email)
+        """Без учета регистра (индекс ix_user_email_lower), точное совпадение - первым."""
+        query = (
+            select(User).where(func.lower(User.email) == email.lower()).order_by((User.email == email).desc()).limit(1)
+        )
+        return await exactly_one(session, query)
 
     @classmethod
     async def delete(cls, session: AsyncSession, user_id: str) -> None:
         await cls.crud.delete(session, "id", user_id)
+        principal_cache.invalidate_on_commit(session, user_id=user_id)
 
 
 class RoleCRUD:
     crud = RoleCRUDModel
 
     @classmethod
-    async def get(cls, session: AsyncSession, field: str, value: Any) -> User | None:
-        return await cls.crud.get(session, field, value)
+    async def get(
+        cls, session: AsyncSession, field: str, value: Any, options: Sequence[ExecutableOption] = ()
+    ) -> Role | None:
+        return await cls.crud.get(session, field, value, options)
 
     @classmethod
-    async def get_all(cls, session: AsyncSession) -> list[User]:
-        return await get_list(session, select(Role))
+    async def get_all(cls, session: AsyncSession, options: Sequence[ExecutableOption] = ()) -> list[Role]:
+        return await get_list(session, select(Role), options)
 
     @classmethod
     async def delete(cls, session: AsyncSession, role_id: str) -> None:
         await cls.crud.delete(session, "id", role_id)
+        role_registry.discard_on_commit(session, UUID(str(role_id)))
 
     @classmethod
     async def get_or_create(cls, session: AsyncSession, role_create: RoleCreate) -> RoleBase | tuple[RoleBase, bool]:
         role = await cls.crud.get(session, "name", role_create.name)
         if role:
             return role, False
-        return (await cls.crud.create(session, **role_create.model_dump()), True)
+        role = await cls.crud.create(session, **role_create.model_dump())
+        role_registry.add_on_commit(session, role.id, role.name)
+        return role, True
 
 
 async def create_superuser(session: AsyncSession):  # наглядно get_or_create и create
@@ -141,6 +195,7 @@ async def create_superuser(session: AsyncSession):  # наглядно get_or_cr
 
 
 async def get_user(session: SessionDep, username: str) -> User:
-    user = await UserCRUD.get_by_username(session, username)
+    """Пользователь с ролью одним запросом (JOIN) - для аутентификации и claim `authz`."""
+    user = await UserCRUD.get_by_username(session, username, [joinedload(User.role, innerjoin=True)])
     if user:
         return user
@@ -2,8 +2,18 @@ import pytest
 from httpx import AsyncClient
 
 from src.config import settings
+from src.db import async_session_factory
+from src.users import constants
+from src.users.roles import role_registry
 from src.users.schemas import UserRegister
 
+API = f"http://127.0.0.1:8000/api/v{settings.APP_VERSION}"
+
+
+def user_statements(statements: list[str]) -> list[str]:
+    """Выражения к таблицам user и role (без троттлинга логина, denylist и т.п.)."""
+    return [statement for statement in statements if '"user"' in statement or " role" in statement]
+
 
 @pytest.mark.asyncio
 async def test_create_user(client: AsyncClient):
@@ -18,3 +28,57 @@ async def test_create_user(client: AsyncClient):
 
     response = await client.get(f"http://127.0.0.1:8000/api/v{settings.APP_VERSION}/users/{new_user_id}")
     assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "username, email",
+    [("test_user", "test_other@example.com"), ("test_other_user", "test@example.com")],
+)
+async def test_signup_with_taken_username_or_email(client: AsyncClient, username: str, email: str):
+    response = await client.post(
+        f"{API}/users/signup",
+        json=UserRegister(username="test_user", email="test@example.com", password="test_password").model_dump(),
+    )
+    assert response.status_code == 200
+    response = await client.post(
+        f"http://127.0.0.1:8000/api/v{settings.APP_VERSION}/users/signup",
+        json=UserRegister(username=username, email=email, password="test_password").model_dump(),
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == constants.USER_ALREADY_EXISTS
+
+
+@pytest.mark.asyncio
+async def test_signup_is_a_single_statement(client: AsyncClient, statements: list[str]):
+    async with async_session_factory() as session:
+        await role_registry.load(session)  # lifespan в тестовом клиенте не выполняется
+    statements.clear()
+    response = await client.post(
+        f"{API}/users/signup",
+        json=UserRegister(
+            username="test_single_insert", email="single@example.com", password="test_password"
+        ).model_dump(),
+    )
+    assert response.status_code == 200
+    assert len(statements) == 1
+    assert statements[0].startswith('INSERT INTO "user"')
+
+
+@pytest.mark.asyncio
+async def test_login_loads_user_and_role_in_one_statement(client: AsyncClient, statements: list[str]):
+    response = await client.post(
+        f"{API}/auth/access-token",
+        data={"username": settings.FIRST_SUPERUSER, "password": settings.FIRST_SUPERUSER_PASSWORD},
+    )
+    assert response.status_code == 200
+    selects = [statement for statement in user_statements(statements) if statement.startswith("SELECT")]
+    assert len(selects) == 1
+    assert "JOIN role" in selects[0]
+
+    statements.clear()
+    response = await client.get(f"{API}/users/", headers={"Authorization": f"Bearer {response.json()['access_token']}"})
+    assert response.status_code == 200
+    # пользователь с ролью для аутентификации (если не в кэше), страница и число строк, без загрузки ролей
+    assert len(user_statements(statements)) <= 3
+    assert not any("FROM role" in statement for statement in statements)
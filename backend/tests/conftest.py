@@ -1,14 +1,133 @@
-# from collections.abc import AsyncGenerator
-from collections.abc import AsyncGenerator
+import os
+import subprocess
+import sys
+from collections.abc import AsyncGenerator, Generator
+from pathlib import Path
 from typing import Any
 
+import pytest
 import pytest_asyncio
+from alembic.script import ScriptDirectory
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import Connection, create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.pool import NullPool
 
+from src.auth.cache import verified_token_cache
+from src.auth.revocation import token_denylist
+from src.auth.throttling import login_throttle
+from src.config import settings
+from src.db import build_engine, rollback_transaction
 from src.main import app
+from src.pool import PoolStats
+from src.users.authz import authz_versions
+from src.users.cache import principal_cache
+from src.users.roles import role_registry
+
+BACKEND = Path(__file__).parents[1]
+# у каждого воркера pytest-xdist своя база, клон шаблона с миграциями и данными src/initial_data.py
+WORKER = os.environ.get("PYTEST_XDIST_WORKER", "main")
+TEMPLATE_LOCK = 20_250_325  # ключ pg_advisory_lock: шаблон и клоны создает один воркер за раз
+SAVEPOINT_STATEMENTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+def database_exists(conn: Connection, name: str) -> bool:
+    return conn.execute(text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": name}).first() is not None
+
+
+def drop_database(conn: Connection, name: str) -> None:
+    """DROP DATABASE ... WITH (FORCE) есть только с PostgreSQL 13, в docker-compose - 12."""
+    conn.execute(
+        text(
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = :name AND pid <> pg_backend_pid()"
+        ),
+        {"name": name},
+    )
+    conn.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+
+
+def build_template(conn: Connection, template: str) -> None:
+    """Миграции и начальные данные, как в scripts/prestart.sh; имя шаблону дается только готовой базе."""
+    building = f"{template}_build"
+    drop_database(conn, building)
+    conn.execute(text(f'CREATE DATABASE "{building}"'))
+    env = {**os.environ, "POSTGRES_DB": building}
+    for command in (["alembic", "upgrade", "head"], ["src.initial_data"]):
+        subprocess.run([sys.executable, "-m", *command], cwd=BACKEND, env=env, check=True)
+    conn.execute(text(f'ALTER DATABASE "{building}" RENAME TO "{template}"'))
+
+
+@pytest.fixture(scope="session")
+def test_database() -> Generator[str]:
+    """
+    База воркера, клон шаблона. Шаблон называется по head-ревизии миграций и пересоздается
+    при новой миграции; старые шаблоны можно удалить вручную.
+    """
+    head = ScriptDirectory(str(BACKEND / "src" / "migrations")).get_current_head()
+    template = f"{settings.POSTGRES_DB}_template_{head}"
+    database = f"{settings.POSTGRES_DB}_test_{WORKER}"
+    uri = settings.database_uri(settings.POSTGRES_SERVER, settings.POSTGRES_PORT, driver="psycopg", database="postgres")
+    maintenance = create_engine(uri, isolation_level="AUTOCOMMIT", poolclass=NullPool)
+    with maintenance.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": TEMPLATE_LOCK})
+        try:
+            if not database_exists(conn, template):
+                build_template(conn, template)
+            drop_database(conn, database)
+            conn.execute(text(f'CREATE DATABASE "{database}" TEMPLATE "{template}"'))
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": TEMPLATE_LOCK})
+    yield database
+    with maintenance.connect() as conn:
+        drop_database(conn, database)
+    maintenance.dispose()
 
 
 @pytest_asyncio.fixture(scope="session")
-async def client() -> AsyncGenerator[AsyncClient, Any]:
+async def test_engine(test_database: str) -> AsyncGenerator[AsyncEngine]:
+    uri = settings.database_uri(settings.POSTGRES_SERVER, settings.POSTGRES_PORT, database=test_database)
+    engine = build_engine(uri, PoolStats("test"))
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def db(test_engine: AsyncEngine) -> AsyncGenerator[AsyncConnection]:
+    """Сессии приложения на время теста работают в транзакции, которая откатывается в конце."""
+    async with rollback_transaction(test_engine) as connection:
+        yield connection
+    reset_process_state()
+
+
+def reset_process_state() -> None:
+    """
+    Кэши и счетчики процесса ссылаются на строки, которых после отката уже нет, а клоны шаблона
+    повторяют id и username, - без сброса отзыв, блокировка логина или claims одного теста
+    достались бы следующему.
+    """
+    principal_cache.clear()
+    authz_versions.clear()
+    verified_token_cache.clear()
+    token_denylist.clear()
+    role_registry.clear()
+    login_throttle.clear()
+
+
+@pytest_asyncio.fixture
+async def client(db: AsyncConnection) -> AsyncGenerator[AsyncClient, Any]:
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
         yield c
+
+
+@pytest.fixture
+def statements(test_engine: AsyncEngine, db: AsyncConnection) -> Generator[list[str]]:
+    """SQL-выражения приложения за время теста, без SAVEPOINT тестовой транзакции."""
+    executed: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        if not statement.startswith(SAVEPOINT_STATEMENTS):
+            executed.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(test_engine.sync_engine, "before_cursor_execute", record)
@@ -0,0 +1,53 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.config import settings
+from src.db import build_engine
+from src.pool import PoolStats
+from src.users.constants import UserRolesEnum
+from src.users.schemas import RoleCreate, UserCreate
+from src.users.service import RoleCRUD, UserCRUD
+
+# PgBouncer в режиме transaction перед базой с данными из src/initial_data.py, например
+# docker compose --profile pgbouncer up -d и PGBOUNCER_SERVER=localhost:6432
+PGBOUNCER_SERVER = os.environ.get("PGBOUNCER_SERVER")
+
+pytestmark = pytest.mark.skipif(not PGBOUNCER_SERVER, reason="PGBOUNCER_SERVER is not set")
+
+
+@pytest.mark.parametrize("driver", ["psycopg", "asyncpg"])
+@pytest.mark.parametrize("pool_size", [0, 2])
+async def test_crud_through_pgbouncer_transaction_pooling(monkeypatch, driver: str, pool_size: int):
+    monkeypatch.setattr(settings, "POSTGRES_PGBOUNCER", True)
+    monkeypatch.setattr(settings, "POSTGRES_PGBOUNCER_POOL_SIZE", pool_size)
+    host, _, port = PGBOUNCER_SERVER.partition(":")
+    engine = build_engine(settings.database_uri(host, int(port or 6432), driver=driver), PoolStats(driver), driver)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def lookup() -> tuple[uuid.UUID, uuid.UUID]:
+        # одни и те же выражения много раз подряд на разных серверных соединениях PgBouncer
+        async with session_factory() as session, session.begin():
+            role, _ = await RoleCRUD.get_or_create(session, RoleCreate(name=UserRolesEnum.user))
+            user = await UserCRUD.get_by_username(session, settings.FIRST_SUPERUSER)
+            return role.id, user.id
+
+    try:
+        results = await asyncio.gather(*(lookup() for _ in range(20)))
+        assert len(set(results)) == 1
+
+        username = f"pgbouncer_{uuid.uuid4().hex[:8]}"
+        async with session_factory() as session, session.begin():
+            user = await UserCRUD.create(
+                session, UserCreate(username=username, email=f"{username}@example.com", password="pgbouncer_password")
+            )
+        async with session_factory() as session, session.begin():
+            assert (await UserCRUD.get_by_username(session, username)).id == user.id
+            await UserCRUD.delete(session, user.id)
+        async with session_factory() as session, session.begin():
+            assert await UserCRUD.get_by_username(session, username) is None
+    finally:
+        await engine.dispose()
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import time
+import uuid
+from collections.abc import AsyncGenerator
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.auth.throttling import MemoryThrottleBackend, PostgresThrottleBackend, RedisThrottleBackend, ThrottleBackend
+from src.config import settings
+from src.db import build_engine
+from src.pool import PoolStats
+
+# Redis для RedisThrottleBackend, например docker run -p 6379:6379 redis и REDIS_URL=redis://localhost:6379/0;
+# Postgres - база тестов (фикстура test_database), без сервера вариант пропускается
+REDIS_URL = os.environ.get("REDIS_URL")
+
+
+@pytest_asyncio.fixture(params=["memory", "postgres", "redis"])
+async def backend(request) -> AsyncGenerator[ThrottleBackend]:
+    if request.param == "memory":
+        yield MemoryThrottleBackend()
+    elif request.param == "postgres":
+        try:
+            database = request.getfixturevalue("test_database")
+        except OperationalError as e:
+            pytest.skip(f"PostgreSQL is unavailable: {e}")
+        uri = settings.database_uri(settings.POSTGRES_SERVER, settings.POSTGRES_PORT, database=database)
+        engine = build_engine(uri, PoolStats("throttle"))
+        yield PostgresThrottleBackend(async_sessionmaker(engine, expire_on_commit=False))
+        await engine.dispose()
+    else:
+        if not REDIS_URL:
+            pytest.skip("REDIS_URL is not set")
+        pytest.importorskip("redis")
+        backend = RedisThrottleBackend(REDIS_URL, prefix=f"test-throttle-{uuid.uuid4().hex}:")
+        yield backend
+        await backend.redis.aclose()
+
+
+async def test_rejection_does_not_spend_tokens(backend: ThrottleBackend):
+    key, rate, burst = f"ip:{uuid.uuid4().hex}", 10.0, 2
+    assert [await backend.consume(key, rate, burst) for _ in range(burst)] == [0, 0]
+    retry_after = await backend.consume(key, rate, burst)
+    assert 0 < retry_after <= 1 / rate
+    for _ in range(5):  # отказы не уводят bucket в минус, ожидание не растет
+        assert 0 < await backend.consume(key, rate, burst) <= retry_after
+    await asyncio.sleep(retry_after + 0.01)  # клиент, выждавший Retry-After, проходит
+    assert await backend.consume(key, rate, burst) == 0
+
+
+async def test_failures_window_and_reset(backend: ThrottleBackend):
+    key, window = f"user:{uuid.uuid4().hex}", 60
+    assert await backend.failures(key, window) == (0, None)
+    for _ in range(2):
+        await backend.add_failure(key, window)
+    count, oldest = await backend.failures(key, window)
+    assert count == 2
+    assert time.time() - window < oldest <= time.time()
+    await backend.reset_failures(key)
+    assert await backend.failures(key, window) == (0, None)
@@ -0,0 +1,46 @@
+import uuid
+
+from src.users.authz import AuthzVersions, build_authz_claim, parse_authz_claim
+from src.users.constants import UserRolesEnum
+from src.users.schemas import UserPrincipal
+
+
+def make_principal(**kwargs) -> UserPrincipal:
+    data = {
+        "id": uuid.uuid4(),
+        "username": "admin",
+        "email": "admin@example.com",
+        "is_superuser": True,
+        "role_id": uuid.uuid4(),
+        "role": UserRolesEnum.admin,
+        "authz_version": 3,
+    }
+    return UserPrincipal(**(data | kwargs))
+
+
+def test_authz_claim_roundtrip():
+    principal = make_principal()
+    claim = build_authz_claim(principal)
+    assert claim["role"] == "admin"
+    authz = parse_authz_claim({"sub": principal.username, "authz": claim})
+    assert authz.id == principal.id
+    assert authz.is_superuser and authz.is_active
+    assert authz.authz_version == 3
+
+
+def test_authz_claim_of_other_version_is_ignored():
+    claim = build_authz_claim(make_principal()) | {"v": 0}
+    assert parse_authz_claim({"sub": "admin", "authz": claim}) is None
+    assert parse_authz_claim({"sub": "admin"}) is None
+
+
+def test_authz_versions_detects_stale_claims():
+    principal = make_principal()
+    authz = parse_authz_claim({"sub": principal.username, "authz": build_authz_claim(principal)})
+    versions = AuthzVersions(maxsize=10)
+    assert not versions.is_stale(authz)
+    versions.observe(principal.id, 3)
+    assert not versions.is_stale(authz)
+    versions.observe(principal.id, 4)
+    versions.observe(principal.id, 2)  # более старая версия не затирает известную
+    assert versions.is_stale(authz)
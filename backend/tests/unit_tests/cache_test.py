@@ -0,0 +1,27 @@
+import time
+
+from src.cache import TTLCache
+
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" становится самым старым
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_expiry_and_hit_rate():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    cache.set("b", 2)
+    assert cache.get("b") == 2
+    assert cache.hit_rate == 0.5
+    assert cache.discard_if(lambda _, value: value == 2) == 1
+    assert len(cache) == 0
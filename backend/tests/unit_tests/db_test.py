@@ -0,0 +1,32 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from src.db import on_commit
+
+
+def test_on_commit_runs_after_outer_commit_only():
+    calls = []
+    with Session(create_engine("sqlite://")) as session, session.begin():
+        session.execute(text("select 1"))
+        on_commit(session, lambda: calls.append("outer"))
+        with session.begin_nested():
+            on_commit(session, lambda: calls.append("nested"))
+        assert calls == []
+    assert calls == ["outer", "nested"]
+
+
+def test_on_commit_dropped_on_rollback():
+    calls = []
+    session = Session(create_engine("sqlite://"))
+    with session.begin():
+        session.execute(text("select 1"))
+        on_commit(session, lambda: calls.append("rolled back"))
+        try:
+            with session.begin_nested():
+                raise ValueError
+        except ValueError:
+            pass
+        session.rollback()
+    with session.begin():
+        session.execute(text("select 1"))
+    assert calls == []
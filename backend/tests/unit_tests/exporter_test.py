@@ -0,0 +1,28 @@
+import csv
+import io
+import json
+import uuid
+
+from src.users.constants import UserExportFormat
+from src.users.exporter import EXPORT_FIELDS, encode_rows
+
+ROWS = [
+    (uuid.uuid4(), "alice", "alice@example.com", "Alice, Jr.", True, False, "user"),
+    (uuid.uuid4(), "bob", "bob@example.com", None, False, True, "admin"),
+]
+
+
+def test_csv_chunks_concatenate_into_one_document():
+    body = encode_rows(ROWS[:1], UserExportFormat.csv, header=True) + encode_rows(ROWS[1:], UserExportFormat.csv)
+    rows = list(csv.reader(io.StringIO(body.decode())))
+    assert rows[0] == list(EXPORT_FIELDS)
+    assert rows[1][1:4] == ["alice", "alice@example.com", "Alice, Jr."]
+    assert rows[2][0] == str(ROWS[1][0])
+    assert len(rows) == 3
+
+
+def test_ndjson_has_one_object_per_line():
+    lines = encode_rows(ROWS, UserExportFormat.ndjson, header=True).decode().splitlines()
+    assert [json.loads(line)["username"] for line in lines] == ["alice", "bob"]
+    assert json.loads(lines[1]) | {"id": None} == dict(zip(EXPORT_FIELDS, (None, *ROWS[1][1:]), strict=True))
+    assert encode_rows([], UserExportFormat.ndjson, header=True) == b""
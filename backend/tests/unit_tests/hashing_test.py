@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+import pytest
+
+from src.auth.exceptions import PasswordHasherBusy
+from src.auth.hashing import PasswordHasher
+
+
+async def test_password_hasher_rejects_when_queue_is_full():
+    hasher = PasswordHasher("thread", max_workers=1, max_queue=1)
+    results = await asyncio.gather(*(hasher.run(time.sleep, 0.05) for _ in range(3)), return_exceptions=True)
+    hasher.shutdown()
+    assert sum(isinstance(result, PasswordHasherBusy) for result in results) == 1
+    stats = hasher.stats()
+    assert stats["rejected"] == 1
+    assert stats["hash_time"]["count"] == 2
+    assert stats["queue_wait"]["max_ms"] >= 40
+
+
+async def test_password_hasher_runs_in_process_pool():
+    hasher = PasswordHasher("process", max_workers=1, max_queue=1)
+    try:
+        assert await hasher.run(pow, 2, 10) == 1024
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.parametrize("executor_type", ["thread", "process"])
+def test_password_hasher_executor_type(executor_type):
+    hasher = PasswordHasher(executor_type, max_workers=1, max_queue=1)
+    assert executor_type.capitalize() in type(hasher.executor).__name__
+    hasher.shutdown()
+
+
+async def test_password_hasher_map_ignores_queue_limit_and_keeps_order():
+    hasher = PasswordHasher("thread", max_workers=2, max_queue=0)
+    try:
+        assert await hasher.map(abs, [-3, 2, -1]) == [3, 2, 1]
+        assert hasher.stats()["running"] == 0
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,41 @@
+from collections.abc import AsyncIterator
+
+from src.users.importer import iter_lines, parse_rows, upsert_fields
+from src.users.schemas import UserImportRow
+
+
+async def stream(*chunks: bytes) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(iterator: AsyncIterator) -> list:
+    return [item async for item in iterator]
+
+
+async def test_lines_split_across_chunks():
+    lines = await collect(iter_lines(stream(b"first\r\nsec", b"ond\n", b"\nthi", b"rd")))
+    assert lines == [b"first", b"second", b"", b"third"]
+
+
+async def test_csv_rows_with_header_and_empty_cells():
+    body = b"\xef\xbb\xbfusername,email,password,full_name\nalice,alice@example.com,password1,\n\nbob,bob@example.com\n"
+    rows = await collect(parse_rows(stream(body[:20], body[20:]), "csv"))
+    assert rows[0] == (2, {"username": "alice", "email": "alice@example.com", "password": "password1"})
+    assert rows[1][0] == 4
+    assert isinstance(rows[1][1], str)
+
+
+async def test_ndjson_rows_report_broken_lines():
+    body = b'{"username": "alice"}\n[1, 2]\nnot json\n{"username": "bob"}'
+    rows = await collect(parse_rows(stream(body), "ndjson"))
+    assert rows[0] == (1, {"username": "alice"})
+    assert [number for number, data in rows if isinstance(data, str)] == [2, 3]
+    assert rows[3] == (4, {"username": "bob"})
+
+
+def test_upsert_updates_only_given_fields():
+    required = {"username": "alice", "email": "alice@example.com", "password": "password1"}
+    assert upsert_fields(UserImportRow.model_validate(required)) == ("email", "hashed_password")
+    row = UserImportRow.model_validate(required | {"is_active": False, "role": "user"})
+    assert upsert_fields(row) == ("email", "hashed_password", "is_active", "role_id")
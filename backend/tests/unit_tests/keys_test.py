@@ -0,0 +1,115 @@
+import json
+import logging
+import time
+from datetime import UTC, datetime, timedelta
+
+import jwt
+import pytest
+
+from src.auth.cache import VerifiedTokenCache
+from src.auth.keys import KeyRing, generate_key, warn_if_secret_not_shared
+from src.config import settings
+from src.constants import Environment
+
+
+def make_keyring(path, reload_seconds=0):
+    return KeyRing(str(path), reload_seconds=reload_seconds, fallback_secret="secret", fallback_alg="HS256")
+
+
+def write_key(directory, data):
+    (directory / f"{data['kid']}.json").write_text(json.dumps(data))
+
+
+def test_keyring_signs_with_kid_and_publishes_only_public_keys(tmp_path):
+    write_key(tmp_path, generate_key("EdDSA", "ed"))
+    write_key(tmp_path, generate_key("HS256", "hs", activate_in=timedelta(days=-1)))
+    keyring = make_keyring(tmp_path)
+
+    token = keyring.encode({"sub": "user"})
+    assert jwt.get_unverified_header(token)["kid"] == "hs"  # активирован позже всех
+    assert keyring.decode(token)["sub"] == "user"
+    assert [key["kid"] for key in keyring.jwks()["keys"]] == ["ed"]
+
+
+def test_keyring_rotation_keeps_retired_keys_verifiable(tmp_path):
+    old = generate_key("RS256", "old")
+    write_key(tmp_path, old)
+    keyring = make_keyring(tmp_path)
+    old_token = keyring.encode({"sub": "user"})
+    generation = keyring.generation
+
+    now = datetime.now(UTC)
+    old["retire_at"] = now.isoformat()
+    old["expire_at"] = (now + timedelta(days=8)).isoformat()
+    write_key(tmp_path, old)
+    write_key(tmp_path, generate_key("EdDSA", "new"))
+    keyring._mtime = None  # mtime файловой системы может не успеть измениться
+    keyring.maybe_reload()
+
+    assert keyring.generation == generation + 1
+    assert jwt.get_unverified_header(keyring.encode({"sub": "user"}))["kid"] == "new"
+    assert keyring.decode(old_token)["sub"] == "user"
+
+    old["expire_at"] = now.isoformat()
+    write_key(tmp_path, old)
+    keyring.load()
+    with pytest.raises(jwt.InvalidTokenError):
+        keyring.decode(old_token)
+
+
+def test_keyring_falls_back_to_secret_key():
+    keyring = KeyRing(None, reload_seconds=0, fallback_secret="secret", fallback_alg="HS256")
+    token = keyring.encode({"sub": "user"})
+    assert jwt.decode(token, "secret", algorithms=["HS256"])["sub"] == "user"
+    assert keyring.jwks() == {"keys": []}
+
+
+def test_verified_token_cache_misses_after_key_material_changes(tmp_path):
+    key = generate_key("HS256", "hs")
+    write_key(tmp_path, key)
+    keyring = make_keyring(tmp_path)
+    cache = VerifiedTokenCache(maxsize=10, keyring=keyring)
+    token = keyring.encode({"sub": "user", "exp": datetime.now(UTC) + timedelta(hours=1)})
+    cache.put(token, keyring.decode(token))
+    fingerprint = keyring.fingerprint
+    assert cache.get(token)["sub"] == "user"
+
+    key["secret"] = generate_key("HS256", "hs")["secret"]  # тот же kid, alg и expire_at
+    write_key(tmp_path, key)
+    keyring.load()
+
+    assert keyring.fingerprint != fingerprint
+    assert cache.get(token) is None
+    with pytest.raises(jwt.InvalidTokenError):
+        keyring.decode(token)
+
+
+def test_verified_token_cache_entry_expires_with_its_key(tmp_path, monkeypatch):
+    key = generate_key("EdDSA", "ed")
+    key["expire_at"] = (datetime.now(UTC) + timedelta(seconds=60)).isoformat()
+    write_key(tmp_path, key)
+    keyring = make_keyring(tmp_path)
+    cache = VerifiedTokenCache(maxsize=10, keyring=keyring)
+    token = keyring.encode({"sub": "user", "exp": datetime.now(UTC) + timedelta(hours=1)})
+    cache.put(token, keyring.decode(token))
+    assert cache.get(token)["sub"] == "user"
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    assert cache.get(token) is None
+
+
+def test_warns_when_workers_do_not_share_the_secret(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "JWT_KEYS_PATH", None)
+    monkeypatch.setattr(settings, "ENVIRONMENT", Environment.LOCAL)
+    monkeypatch.setattr(settings, "__pydantic_fields_set__", settings.model_fields_set - {"SECRET_KEY"})
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    with caplog.at_level(logging.WARNING, logger="src.auth.keys"):
+        warn_if_secret_not_shared()
+    assert "random per-process secret" in caplog.text
+
+    caplog.clear()
+    monkeypatch.setattr(settings, "__pydantic_fields_set__", settings.model_fields_set | {"SECRET_KEY"})
+    with caplog.at_level(logging.WARNING, logger="src.auth.keys"):
+        warn_if_secret_not_shared()
+    assert caplog.text == ""
@@ -0,0 +1,36 @@
+import uuid
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+
+from src.constants import SortOrder
+from src.exceptions import InvalidCursor
+from src.models import Explain, decode_cursor, encode_cursor
+from src.users.models import User
+
+
+def test_cursor_round_trip_restores_column_types():
+    user_id = uuid.uuid4()
+    cursor = encode_cursor("username", SortOrder.asc, ["alice", user_id])
+    assert decode_cursor(cursor, "username", SortOrder.asc, [User.username, User.id]) == ["alice", user_id]
+
+
+@pytest.mark.parametrize(
+    "cursor, sort, order",
+    [
+        (encode_cursor("username", SortOrder.asc, ["alice", uuid.uuid4()]), "email", SortOrder.asc),
+        (encode_cursor("username", SortOrder.asc, ["alice", uuid.uuid4()]), "username", SortOrder.desc),
+        (encode_cursor("username", SortOrder.asc, ["alice", "not-a-uuid"]), "username", SortOrder.asc),
+        ("not a cursor", "username", SortOrder.asc),
+    ],
+)
+def test_foreign_or_broken_cursor_is_rejected(cursor: str, sort: str, order: SortOrder):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, sort, order, [getattr(User, sort), User.id])
+
+
+def test_estimate_explains_filtered_query():
+    sql = str(Explain(select(User).where(User.is_active)).compile(dialect=postgresql.dialect()))
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "WHERE" in sql
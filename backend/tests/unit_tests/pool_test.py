@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import QueuePool
+
+from src.metrics import prometheus_text
+from src.pool import PoolStats
+
+
+def test_pool_stats_counts_checkouts_and_timeouts():
+    stats = PoolStats("test", base=QueuePool)
+    engine = create_engine("sqlite://", poolclass=stats.pool_class, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    stats.attach(engine)
+
+    connection = engine.connect()
+    assert stats.stats()["in_use"] == 1
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    connection.close()
+    with engine.connect():
+        pass
+
+    result = stats.stats()
+    assert result["checkouts"] == 2
+    assert result["checkins"] == 2
+    assert result["connects"] == 1
+    assert result["timeouts"] == 1
+    assert result["in_use"] == 0
+    assert result["max_in_use"] == 1
+    assert result["checkout_wait"]["count"] == 3
+    assert result["checkout_wait"]["max_ms"] >= 50
+
+    engine.dispose()
+    assert isinstance(engine.pool, stats.pool_class)
+
+
+def test_prometheus_text_groups_samples_by_metric():
+    text = prometheus_text(
+        [
+            ("db_pool_in_use", "gauge", "In use.", {"pool": "primary"}, 1),
+            ("db_pool_checkouts_total", "counter", "Checkouts.", {"pool": "primary"}, 5),
+            ("db_pool_in_use", "gauge", "In use.", {"pool": "replica"}, 2),
+        ]
+    )
+    assert text.splitlines() == [
+        "# HELP db_pool_checkouts_total Checkouts.",
+        "# TYPE db_pool_checkouts_total counter",
+        'db_pool_checkouts_total{pool="primary"} 5',
+        "# HELP db_pool_in_use In use.",
+        "# TYPE db_pool_in_use gauge",
+        'db_pool_in_use{pool="primary"} 1',
+        'db_pool_in_use{pool="replica"} 2',
+    ]
@@ -0,0 +1,79 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from src.config import settings
+from src.main import query_stats_middleware
+from src.query_stats import assert_queries, instrument, track_queries
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    instrument(engine)
+    return engine
+
+
+def test_track_queries_counts_and_detects_repeats(engine):
+    with engine.connect() as conn, track_queries() as stats:
+        conn.execute(text("select 1"))
+        for _ in range(3):
+            conn.execute(text("select 2"))
+    assert stats.count == 4
+    assert stats.slowest_statement is not None
+    assert stats.repeated(threshold=3) == {"select 2": 3}
+    assert stats.server_timing().startswith("db;dur=")
+
+    with engine.connect() as conn:  # вне блока выражения не учитываются
+        conn.execute(text("select 3"))
+    assert stats.count == 4
+
+
+def test_assert_queries_fails_on_too_many_or_repeated(engine, monkeypatch):
+    monkeypatch.setattr(settings, "POSTGRES_REPEATED_QUERY_THRESHOLD", 2)
+    with engine.connect() as conn:
+        with assert_queries(1):
+            conn.execute(text("select 1"))
+        with pytest.raises(AssertionError), assert_queries(1):
+            conn.execute(text("select 1"))
+            conn.execute(text("select 2"))
+        with pytest.raises(AssertionError, match="Repeated"), assert_queries(5):
+            conn.execute(text("select 1"))
+            conn.execute(text("select 1"))
+
+
+def test_slow_queries_are_logged_and_failed_ones_do_not_leak(engine, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "POSTGRES_SLOW_QUERY_SECONDS", 0)
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("select * from missing_table"))
+        with caplog.at_level(logging.WARNING, logger="src.query_stats"):
+            conn.execute(text("select 1"))
+        assert conn.info["query_started_at"] == []
+    assert "Slow query" in caplog.text
+
+
+async def test_middleware_counts_queries_of_streamed_body(engine, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "POSTGRES_REPEATED_QUERY_THRESHOLD", 3)
+    app = FastAPI()
+    app.middleware("http")(query_stats_middleware)
+
+    @app.get("/stream")
+    def stream() -> StreamingResponse:
+        def body():  # выражения выполняются, когда middleware уже получил ответ
+            with engine.connect() as conn:
+                for _ in range(3):
+                    yield str(conn.execute(text("select 1")).scalar())
+
+        return StreamingResponse(body())
+
+    with caplog.at_level(logging.WARNING, logger="src.main"):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/stream")
+    assert response.text == "111"
+    assert "Possible N+1 in GET /stream" in caplog.text
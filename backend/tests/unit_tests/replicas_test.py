@@ -0,0 +1,39 @@
+from fastapi import Request, Response
+
+from src.pool import PoolStats
+from src.replicas import STICKY_COOKIE, Replica, ReplicaRouter
+
+
+def make_request(method: str = "GET", cookie: str | None = None) -> Request:
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    return Request({"type": "http", "method": method, "headers": headers})
+
+
+def make_router(*lags: float | None) -> ReplicaRouter:
+    replicas = [Replica(f"replica{i}", None, None, PoolStats(f"replica{i}"), lag=lag) for i, lag in enumerate(lags)]
+    return ReplicaRouter(replicas, max_lag=5, sticky_seconds=10, check_seconds=1)
+
+
+def test_reads_are_spread_over_fresh_replicas():
+    router = make_router(0.1, 30, 0)
+    chosen = [router.choose(make_request()).name for _ in range(4)]
+    assert chosen == ["replica0", "replica2", "replica0", "replica2"]
+
+
+def test_writes_sticky_clients_and_lagging_replicas_use_primary():
+    router = make_router(0.1)
+    assert router.choose(make_request("POST")) is None
+    assert router.choose(make_request(cookie=f"{STICKY_COOKIE}=1")) is None
+    router.replicas[0].lag = 60
+    assert router.choose(make_request()) is None
+    router.replicas[0].lag = None
+    assert router.choose(make_request()) is None
+    assert router.stats()["lag_fallbacks"] == 2
+
+
+def test_stick_sets_cookie_only_with_replicas():
+    response = Response()
+    make_router().stick(response)
+    assert "set-cookie" not in response.headers
+    make_router(0).stick(response)
+    assert response.headers["set-cookie"].startswith(f"{STICKY_COOKIE}=1")
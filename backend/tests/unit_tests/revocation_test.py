@@ -0,0 +1,32 @@
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from src.auth.models import RevokedToken
+from src.auth.revocation import BloomFilter, TokenDenylist
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000)
+    items = [uuid.uuid4().hex for _ in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10_000))
+    assert false_positives < 100
+
+
+def test_denylist_revokes_single_tokens_and_users():
+    denylist = TokenDenylist(refresh_seconds=1, reload_seconds=60, capacity=2)
+    user_id, other_id = uuid.uuid4(), uuid.uuid4()
+    now = datetime.now(UTC)
+    for _ in range(5):  # больше емкости фильтра - он перестраивается
+        denylist._remember(RevokedToken(jti=uuid.uuid4().hex, revoked_at=now, expires_at=now + timedelta(hours=1)))
+    denylist._remember(RevokedToken(jti="revoked", revoked_at=now, expires_at=now + timedelta(hours=1)))
+    denylist._remember(RevokedToken(user_id=user_id, revoked_at=now, expires_at=now + timedelta(days=8)))
+
+    issued_before = int(now.timestamp()) - 10
+    assert denylist.is_revoked({"jti": "revoked", "iat": issued_before}, other_id)
+    assert not denylist.is_revoked({"jti": "active", "iat": issued_before}, other_id)
+    assert denylist.is_revoked({"jti": "active", "iat": issued_before}, user_id)
+    assert not denylist.is_revoked({"jti": "active", "iat": int(now.timestamp()) + 1}, user_id)
+    assert denylist.stats()["tokens"] == 6
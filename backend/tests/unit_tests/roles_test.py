@@ -0,0 +1,70 @@
+import uuid
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlmodel import SQLModel
+
+from src.users.constants import UserRolesEnum
+from src.users.models import Role
+from src.users.roles import RoleRegistry
+
+
+class SyncSession:
+    """Синхронная сессия sqlite с той частью интерфейса AsyncSession, которая нужна реестру."""
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.info = session.info
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        return self.session.execute(statement)
+
+
+def make_session() -> Session:
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    return Session(engine)
+
+
+async def test_registry_resolves_roles_without_queries_after_load():
+    session = make_session()
+    user_role = Role(name=UserRolesEnum.user)
+    session.add(user_role)
+    session.commit()
+    registry, db = RoleRegistry(), SyncSession(session)
+
+    await registry.load(db)
+    assert await registry.get_id(db, UserRolesEnum.user) == user_role.id
+    assert await registry.get_id(db, "user") == user_role.id
+    assert await registry.get_name(db, user_role.id) == UserRolesEnum.user
+    assert db.queries == 1
+
+    # роль из другого воркера: промах перечитывает таблицу
+    admin_role = Role(name=UserRolesEnum.admin)
+    session.add(admin_role)
+    session.commit()
+    assert await registry.get_name(db, admin_role.id) == UserRolesEnum.admin
+    assert await registry.get_name(db, uuid.uuid4()) is None
+    assert db.queries == 3
+
+
+def test_registry_applies_changes_after_commit_only():
+    session = make_session()
+    registry, db = RoleRegistry(), SyncSession(session)
+    role_id = uuid.uuid4()
+
+    with session.begin():
+        registry.add_on_commit(db, role_id, UserRolesEnum.admin)
+        assert registry._names == {}
+    assert registry._names == {role_id: UserRolesEnum.admin}
+
+    with session.begin():
+        registry.discard_on_commit(db, role_id)
+        session.rollback()
+    assert registry._ids == {UserRolesEnum.admin: role_id}
+
+    with session.begin():
+        registry.discard_on_commit(db, role_id)
+    assert registry._ids == {}
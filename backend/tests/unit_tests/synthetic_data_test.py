@@ -0,0 +1,25 @@
+import uuid
+
+from src.synthetic_data import user_row, username
+from src.users.constants import UserRolesEnum
+
+ROLE_IDS = {UserRolesEnum.user: uuid.uuid4(), UserRolesEnum.admin: uuid.uuid4()}
+
+
+def rows(seed: int, numbers: range) -> list[dict]:
+    return [user_row(number, seed, "synthetic_", ROLE_IDS, "hash", 0.9, 0.1) for number in numbers]
+
+
+def test_rows_depend_only_on_seed_and_number():
+    assert rows(1, range(1, 11)) == rows(1, range(1, 6)) + rows(1, range(6, 11))
+    assert rows(1, range(1, 11)) != rows(2, range(1, 11))
+    assert rows(1, range(42, 43))[0]["username"] == username(42) == "synthetic_000000042"
+
+
+def test_rows_are_spread_across_roles_and_flags():
+    generated = rows(7, range(1, 2001))
+    admins = sum(row["role_id"] == ROLE_IDS[UserRolesEnum.admin] for row in generated)
+    active = sum(row["is_active"] for row in generated)
+    assert 100 < admins < 300
+    assert 1700 < active < 1900
+    assert len({row["id"] for row in generated}) == len({row["email"] for row in generated}) == 2000
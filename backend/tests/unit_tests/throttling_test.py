@@ -0,0 +1,41 @@
+import pytest
+
+from src.auth.exceptions import LoginThrottled
+from src.auth.throttling import LoginThrottle, MemoryThrottleBackend
+from src.config import settings
+
+
+async def test_token_bucket_rejects_after_burst():
+    backend = MemoryThrottleBackend()
+    assert [await backend.consume("key", rate=1, burst=3) for _ in range(3)] == [0, 0, 0]
+    assert await backend.consume("key", rate=1, burst=3) > 0
+
+
+async def test_login_throttle_penalizes_failures(monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_THROTTLE_USERNAME_MAX_FAILURES", 2)
+    monkeypatch.setattr(settings, "LOGIN_THROTTLE_USERNAME_BURST", 100)
+    throttle = LoginThrottle(MemoryThrottleBackend())
+
+    for _ in range(2):
+        await throttle.check("User", "10.0.0.1")
+        await throttle.register_failure("User", "10.0.0.1")
+    with pytest.raises(LoginThrottled) as e:
+        await throttle.check("user", "10.0.0.2")
+    assert 0 < e.value.retry_after <= settings.LOGIN_THROTTLE_FAILURE_WINDOW_SECONDS
+    await throttle.check("other", "10.0.0.1")  # счетчик IP еще не достиг порога
+
+    await throttle.register_success("user")
+    await throttle.check("user", "10.0.0.2")
+    assert throttle.stats()["rejected"] == 1
+
+
+async def test_login_throttle_rejected_by_ip_does_not_charge_username(monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_THROTTLE_IP_BURST", 1)
+    monkeypatch.setattr(settings, "LOGIN_THROTTLE_USERNAME_BURST", 2)
+    throttle = LoginThrottle(MemoryThrottleBackend())
+
+    await throttle.check("victim", "10.0.0.1")
+    for _ in range(5):  # IP атакующего исчерпан, username жертвы не тратится
+        with pytest.raises(LoginThrottled):
+            await throttle.check("victim", "10.0.0.1")
+    await throttle.check("victim", "10.0.0.2")